@@ -0,0 +1,298 @@
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import time
+from datetime import datetime
+import numpy as np
+from emg_core.artifacts import ModelArtifacts
+from emg_core.benchmark import (StageTimes, latency_summary, machine_info, save_results, load_results,
+                                compare_to_baseline, format_run)
+from emg_core.ring_buffer import RingBuffer
+
+# Replays a recording through the live pipeline as fast as it will go and times every
+# stage of each tick: board read, filter, buffer append, normalization, inference,
+# decision and socket send. A game client in a separate process measures how long
+# each published gesture takes to arrive.
+#
+# Each run is compared against EMG Files/Benchmarks/baseline.json and exits with
+# status 1 on a regression. The first run on a machine writes that baseline; after
+# an intended performance change, store the new numbers with --save-baseline.
+
+# Define directory structure (same as above)
+BASE_DIR = "EMG Files"
+SIGNAL_DIR = os.path.join(BASE_DIR, "Signal Files")
+BENCHMARK_DIR = os.path.join(BASE_DIR, "Benchmarks")
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+
+RECORDING = "emg_signals_4(new_electrode_placement).csv"
+# Training run benchmarked at each window size (the sizes found in Model Files)
+WINDOW_SIZE_TAGS = {
+    50: "3(all_group_members)_(50_window_size)",
+    100: "4(new_electrode_placement)",
+    200: "2(200_window)",
+}
+# The NumPy CNN does not depend on the window length, so window sizes without
+# exported weights are timed with these
+FALLBACK_WEIGHTS_TAG = "4(new_electrode_placement)"
+BACKENDS = ["keras", "onnx", "numpy", "incremental"]
+INT8_BACKEND = "onnx-int8"  # opt-in with --int8: the model from Main_RebuildAndExport_onnx.py --quantize
+
+STRIDE = 10            # samples per tick, as Main_Predict sees them (~50 ms at 200 Hz)
+TICKS = 2000           # timed ticks per run
+WARMUP_TICKS = 50      # untimed ticks after the buffers first fill
+TOLERANCE = 0.25       # allowed slowdown against the baseline
+ACTIVE_CHANNELS = [0]  # EMG channels to use
+
+# Map numeric predictions to gesture names
+GESTURES = {
+    0: "Propulsion",
+    1: "Rest"
+    }
+
+DELIVERY_CAPACITY = 1 << 16  # latencies kept by the client per run
+
+
+#===================================================================================================
+def delivery_client(port, latencies, count):
+    """
+    Game client in its own process: stores how long each gesture frame took
+    from publish() to arrival, in microseconds.
+    """
+    from emg_core.transport import read_gestures
+    for timestamp, _, _ in read_gestures('127.0.0.1', port):
+        latency = (time.time() - timestamp) * 1e6
+        with count.get_lock():
+            latencies[count.value % DELIVERY_CAPACITY] = latency
+            count.value += 1
+
+
+def load_pipeline_backend(artifacts, backend_name, n_channels):
+    """
+    The backend to time and the model file it runs.
+    Raises:
+        LookupError (with the reason) when the combination cannot be benchmarked here
+    """
+    if backend_name == "keras":
+        try:
+            import tensorflow  # noqa: F401
+        except ImportError:
+            raise LookupError("TensorFlow is not installed")
+    if backend_name in ("numpy", "incremental"):
+        from emg_core.numpy_cnn import NumpyCNN, IncrementalCNN
+        path = artifacts.model_path("numpy")
+        if not os.path.exists(path):
+            path = ModelArtifacts(BASE_DIR, FALLBACK_WEIGHTS_TAG).model_path("numpy")
+        cnn = NumpyCNN.from_npz(path)
+        if cnn.n_channels != n_channels:
+            raise LookupError(f"{os.path.basename(path)} expects {cnn.n_channels} channels")
+        backend = IncrementalCNN(cnn, artifacts.window_size) if backend_name == "incremental" else cnn
+        return backend, os.path.basename(path)
+    if backend_name == INT8_BACKEND:
+        path = artifacts.quantized_model_path
+        if not os.path.exists(path):
+            raise LookupError(f"no {os.path.basename(path)} (write it with Main_RebuildAndExport_onnx.py --quantize)")
+        return artifacts.load_backend("onnx", n_channels, quantized=True), os.path.basename(path)
+
+    path = artifacts.model_path(backend_name)
+    if not os.path.exists(path):
+        raise LookupError(f"no {os.path.basename(path)}")
+    return artifacts.load_backend(backend_name, n_channels), os.path.basename(path)
+
+
+def run_pipeline(session, classifier, backend, incremental, server, stride, ticks):
+    """
+    Time every stage of the Main_Predict loop over a max-speed replay.
+    Returns:
+        (StageTimes, seconds spent in the timed ticks)
+    """
+    from brainflow.board_shim import BoardShim
+    from emg_core.acquisition import BoardReader
+    from emg_core.preprocessing import StreamingFilter
+    from emg_core.replay import ReplayBoard
+
+    window_size = classifier.window_size
+    n_channels = len(ACTIVE_CHANNELS)
+    board = ReplayBoard(session, speed=None, loop=True, max_chunk=stride)
+    board.prepare_session()
+    board.start_stream()
+    emg_channels = BoardShim.get_emg_channels(board.get_board_id())
+    reader = BoardReader(board, [emg_channels[ch] for ch in ACTIVE_CHANNELS])
+    stream_filter = StreamingFilter(board.get_sampling_rate(), n_channels)
+    data_buffer = RingBuffer(n_channels, window_size, dtype=np.float32)
+    filtered_buffer = RingBuffer(n_channels, window_size, dtype=np.float32)
+    times = StageTimes()
+    clock = time.perf_counter_ns
+
+    def tick(timed):
+        t0 = clock()
+        data = reader.read()
+        t1 = clock()
+        filtered_samples = stream_filter.process(data.T)
+        t2 = clock()
+        data_buffer.extend(data)
+        filtered_buffer.extend(filtered_samples.T)
+        t3 = clock()
+        if incremental:
+            batch = classifier.normalize(filtered_samples)
+            t4 = clock()
+            step_probs = backend.update(batch)
+            if len(data_buffer) < window_size:
+                return
+            probs = step_probs[-1]
+        else:
+            if len(data_buffer) < window_size:
+                return
+            window = filtered_buffer.latest(window_size).T
+            batch = classifier.prepare(window)
+            t4 = clock()
+            probs = backend.predict(batch)[0]
+        t5 = clock()
+        gesture_name, confidence, _ = classifier.decode(probs)
+        t6 = clock()
+        server.publish(int(np.argmax(probs)), confidence)
+        t7 = clock()
+        if timed:
+            for stage, start, end in (("board read", t0, t1), ("filter", t1, t2), ("buffer append", t2, t3),
+                                      ("normalize", t3, t4), ("inference", t4, t5), ("decision", t5, t6),
+                                      ("socket send", t6, t7), ("tick", t0, t7)):
+                times.record(stage, end - start)
+
+    try:
+        while len(data_buffer) < window_size:
+            tick(timed=False)
+        for _ in range(WARMUP_TICKS):
+            tick(timed=False)
+        started = time.perf_counter()
+        for _ in range(ticks):
+            tick(timed=True)
+        elapsed = time.perf_counter() - started
+    finally:
+        board.stop_stream()
+        board.release_session()
+    return times, elapsed
+
+
+def run_all(args, session, server, latencies, count):
+    """Benchmark every (window size, backend) pair; returns the results dict."""
+    from emg_core.backends import GestureClassifier
+    sampling_rate = session.sampling_rate or 200
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "recording": args.recording,
+        "stride": args.stride,
+        "ticks": args.ticks,
+        "runs": [],
+        "skipped": [],
+    }
+    for window_size in args.window_sizes:
+        artifacts = ModelArtifacts(BASE_DIR, WINDOW_SIZE_TAGS[window_size])
+        for backend_name in args.backends:
+            try:
+                backend, model = load_pipeline_backend(artifacts, backend_name, len(ACTIVE_CHANNELS))
+            except LookupError as e:
+                print(f"W={window_size} {backend_name}: skipped ({e})")
+                results["skipped"].append({"window_size": window_size, "backend": backend_name,
+                                           "reason": str(e)})
+                continue
+            classifier = GestureClassifier(backend, artifacts.norm_params['mean'], artifacts.norm_params['std'],
+                                           artifacts.window_size, artifacts.label_encoder, GESTURES)
+
+            with count.get_lock():
+                count.value = 0
+            dropped_before = server.dropped_frames
+            times, elapsed = run_pipeline(session, classifier, backend, backend_name == "incremental",
+                                          server, args.stride, args.ticks)
+            time.sleep(0.2)  # let the last frames arrive
+            with count.get_lock():
+                delivered = min(count.value, DELIVERY_CAPACITY)
+                delivery = latency_summary(latencies[:delivered])
+
+            predictions_per_s = args.ticks / elapsed
+            run = {
+                "window_size": window_size,
+                "backend": backend_name,
+                "model": model,
+                "predictions_per_s": predictions_per_s,
+                # Recorded time processed per second of compute
+                "realtime_factor": predictions_per_s * args.stride / sampling_rate,
+                "stages": {**times.summary(), "socket delivery": delivery},
+                "dropped_frames": server.dropped_frames - dropped_before,
+            }
+            results["runs"].append(run)
+            print(format_run(run) + "\n")
+    return results
+
+
+async def serve_and_run(args, session):
+    from emg_core.transport import GestureServer
+    server = GestureServer('127.0.0.1', 0)
+    await server.start()
+    serving = asyncio.create_task(server.serve_forever())
+
+    latencies = mp.Array('d', DELIVERY_CAPACITY, lock=False)
+    count = mp.Value('q', 0)
+    client = mp.Process(target=delivery_client, args=(server.port, latencies, count), daemon=True)
+    client.start()
+    try:
+        while server.n_clients == 0:
+            await asyncio.sleep(0.01)
+        # The pipeline publishes from its own thread, as the classifier threads do
+        return await asyncio.to_thread(run_all, args, session, server, latencies, count)
+    finally:
+        client.terminate()
+        client.join()
+        for _ in range(100):  # let the server see the disconnect before it stops
+            if server.n_clients == 0:
+                break
+            await asyncio.sleep(0.01)
+        serving.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every stage of the EMG pipeline on a replayed recording.")
+    parser.add_argument("--recording", default=os.path.join(SIGNAL_DIR, RECORDING),
+                        help="Signal Files CSV or .emg session directory to replay")
+    parser.add_argument("--window-sizes", type=int, nargs="+", default=list(WINDOW_SIZE_TAGS),
+                        choices=list(WINDOW_SIZE_TAGS))
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--int8", action="store_true",
+                        help="Also time the INT8 model written by Main_RebuildAndExport_onnx.py --quantize")
+    parser.add_argument("--stride", type=int, default=STRIDE, help="Samples per tick")
+    parser.add_argument("--ticks", type=int, default=TICKS, help="Timed ticks per run")
+    parser.add_argument("--output", help="JSON results (default: EMG Files/Benchmarks/benchmark_<time>.json)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Allowed relative slowdown before a stage counts as a regression")
+    args = parser.parse_args()
+    if args.int8:
+        args.backends = args.backends + [INT8_BACKEND]
+
+    from emg_core.recording import load_recording
+    session = load_recording(args.recording)
+    print(f"Replaying {args.recording} ({len(session)} samples), {args.stride} samples per tick, "
+          f"{args.ticks} ticks per run\n")
+    results = asyncio.run(serve_and_run(args, session))
+
+    output = args.output or os.path.join(BENCHMARK_DIR, f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json")
+    save_results(output, results)
+    print(f"Results saved to {output}")
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        save_results(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}"
+              + ("" if args.save_baseline else " (none existed; later runs are compared against it)"))
+        return
+    regressions = compare_to_baseline(results, load_results(args.baseline), args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+        for message in regressions:
+            print(f"  {message}")
+        raise SystemExit(1)
+    print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import time
+import pandas as pd
+from emg_core.recording import convert_csv, load_session, session_path_for
+
+# One-shot conversion of recorded CSVs into binary sessions (see emg_core/recording.py).
+# Main_Train / RPS_Train pick up the converted session automatically.
+SIGNAL_DIRS = [
+    os.path.join("EMG Files", "Signal Files"),
+    os.path.join("..", "RockPaperScissors", "EMG Files", "Signal Files"),
+]
+SAMPLING_RATE = 200  # Ganglion
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def main():
+    for signal_dir in SIGNAL_DIRS:
+        if not os.path.isdir(signal_dir):
+            print(f"Skipping missing directory: {signal_dir}")
+            continue
+
+        for filename in sorted(os.listdir(signal_dir)):
+            if not filename.endswith(".csv"):
+                continue
+            csv_path = os.path.join(signal_dir, filename)
+            session_path = session_path_for(csv_path)
+            if os.path.isdir(session_path):
+                print(f"Already converted: {filename}")
+                continue
+
+            convert_csv(csv_path, session_path, SAMPLING_RATE)
+
+            # Compare size and load time against the CSV
+            start = time.perf_counter()
+            pd.read_csv(csv_path)
+            csv_time = time.perf_counter() - start
+            start = time.perf_counter()
+            session = load_session(session_path)
+            session_time = time.perf_counter() - start
+
+            csv_kb = os.path.getsize(csv_path) / 1024
+            session_kb = dir_size(session_path) / 1024
+            print(f"{filename}: {len(session)} samples, {len(session.trials)} trials | "
+                  f"{csv_kb:.0f} KB -> {session_kb:.0f} KB | "
+                  f"load {csv_time * 1000:.1f} ms -> {session_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
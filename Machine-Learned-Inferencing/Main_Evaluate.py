@@ -0,0 +1,127 @@
+import argparse
+import os
+import time
+import numpy as np
+from emg_core.artifacts import ModelArtifacts
+from emg_core.evaluation import (filtered_signal, window_ends, stream_windows, predict_batches, sample_labels,
+                                 confusion_matrix, onset_latencies)
+from emg_core.recording import load_recording
+
+# Scores a stored recording offline, windowed the way Main_Predict sees the live stream:
+# same causal filter, one window per tick ending at the newest sample, same normalization.
+
+# Define directory structure (same as above)
+BASE_DIR = "EMG Files"
+SIGNAL_DIR = os.path.join(BASE_DIR, "Signal Files")
+EVAL_DIR = os.path.join(BASE_DIR, "Evaluations")
+
+RECORDING = "emg_signals_4(new_electrode_placement).csv"  # or a converted .emg session
+MODEL_TAG = "4(new_electrode_placement)"
+INFERENCE_BACKEND = "onnx"
+STRIDE = 10                   # samples per live tick (~50 ms at 200 Hz)
+BATCH_SIZE = 4096             # windows per backend call
+DEFAULT_SAMPLING_RATE = 200   # Ganglion; used when the recording does not store its rate
+
+# Map numeric predictions to gesture names
+GESTURES = {
+    0: "Propulsion",
+    1: "Rest"
+    }
+
+
+def gesture_name(label):
+    return GESTURES.get(int(label), f"Unknown ({label})")
+
+
+def print_confusion_matrix(matrix, labels):
+    names = [gesture_name(label) for label in labels]
+    width = max(12, *(len(name) + 2 for name in names))
+    print(f"\nConfusion matrix (rows = true, columns = predicted):")
+    print(" " * width + "".join(f"{name:>{width}s}" for name in names))
+    for name, row in zip(names, matrix):
+        print(f"{name:<{width}s}" + "".join(f"{count:>{width}d}" for count in row))
+    total = matrix.sum()
+    if total:
+        print(f"Accuracy: {np.trace(matrix) / total:.2%} over {total} labelled windows")
+        for name, row in zip(names, matrix):
+            if row.sum():
+                print(f"  {name}: recall {row[names.index(name)] / row.sum():.2%}")
+
+
+def print_onset_latencies(latencies, sampling_rate):
+    print("\nLatency to detect each gesture onset:")
+    for label in sorted({label for _, label, _ in latencies}):
+        detected = np.array([lat for _, l, lat in latencies if l == label and lat is not None]) / sampling_rate
+        missed = sum(1 for _, l, lat in latencies if l == label and lat is None)
+        if detected.size:
+            print(f"  {gesture_name(label):<12s} median {np.median(detected) * 1e3:6.0f} ms | "
+                  f"mean {detected.mean() * 1e3:6.0f} ms | max {detected.max() * 1e3:6.0f} ms | "
+                  f"missed {missed}/{detected.size + missed}")
+        else:
+            print(f"  {gesture_name(label):<12s} never detected ({missed} trials)")
+
+
+def save_predictions(path, ends, sampling_rate, true_labels, predicted_labels, probabilities, class_labels):
+    columns = ["end_sample", "time_s", "true_label", "predicted_label", "confidence"]
+    columns += [f"p_{gesture_name(label).lower()}" for label in class_labels]
+    table = np.column_stack([ends, ends / sampling_rate, true_labels, predicted_labels,
+                             probabilities.max(axis=1), probabilities])
+    fmt = ["%d", "%.4f", "%d", "%d"] + ["%.6f"] * (1 + probabilities.shape[1])
+    np.savetxt(path, table, delimiter=",", header=",".join(columns), comments="", fmt=fmt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a recorded EMG session offline.")
+    parser.add_argument("recording", nargs="?", default=os.path.join(SIGNAL_DIR, RECORDING),
+                        help="Signal Files CSV or .emg session directory")
+    parser.add_argument("--tag", default=MODEL_TAG, help="Training run tag of the model files")
+    parser.add_argument("--backend", default=INFERENCE_BACKEND, choices=["onnx", "numpy", "keras"])
+    parser.add_argument("--int8", action="store_true",
+                        help="Score the INT8 model written by Main_RebuildAndExport_onnx.py --quantize "
+                             "(onnx backend only)")
+    parser.add_argument("--stride", type=int, default=STRIDE, help="Samples between windows")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--output", help="CSV for per-window predictions (default: EMG Files/Evaluations/...)")
+    args = parser.parse_args()
+    if args.int8 and args.backend != "onnx":
+        parser.error("--int8 runs on the onnx backend")
+    backend_label = f"{args.backend}-int8" if args.int8 else args.backend
+
+    session = load_recording(args.recording)
+    sampling_rate = session.sampling_rate or DEFAULT_SAMPLING_RATE
+    n_channels = session.signal.shape[1]
+    print(f"Recording: {args.recording} ({len(session)} samples, {len(session.trials)} trials, "
+          f"{'pre-filtered' if session.filtered else 'raw'}, {sampling_rate} Hz)")
+
+    artifacts = ModelArtifacts(BASE_DIR, args.tag)
+    classifier = artifacts.load_classifier(args.backend, n_channels, GESTURES, quantized=args.int8)
+    window_size = artifacts.window_size
+
+    normalized = classifier.normalize(filtered_signal(session, sampling_rate))
+    windows = stream_windows(normalized, window_size, args.stride)
+    ends = window_ends(len(normalized), window_size, args.stride)
+
+    started = time.perf_counter()
+    probabilities = predict_batches(classifier.backend, windows, args.batch_size)
+    elapsed = time.perf_counter() - started
+    print(f"Inference ({backend_label}): {len(windows)} windows in {elapsed:.3f} s "
+          f"= {len(windows) / elapsed:,.0f} windows/s")
+
+    class_labels = np.asarray(classifier.class_labels)
+    predicted_labels = class_labels[np.argmax(probabilities, axis=1)]
+    true_labels = sample_labels(session)[ends - 1]
+
+    print_confusion_matrix(confusion_matrix(true_labels, predicted_labels, class_labels), class_labels)
+    print_onset_latencies(onset_latencies(session, ends, predicted_labels), sampling_rate)
+
+    output = args.output
+    if output is None:
+        os.makedirs(EVAL_DIR, exist_ok=True)
+        name = os.path.splitext(os.path.basename(os.path.normpath(args.recording)))[0]
+        output = os.path.join(EVAL_DIR, f"{name}_{args.tag}_{backend_label}.csv")
+    save_predictions(output, ends, sampling_rate, true_labels, predicted_labels, probabilities, class_labels)
+    print(f"\nPer-window predictions saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import threading
+import time
+import numpy as np
+from emg_core.artifacts import ModelArtifacts
+from emg_core.benchmark import latency_summary
+from emg_core.inference_service import InferenceServer, RemoteBackend, default_address
+
+# Serves one model to every predictor on this machine. Start it once, then run
+# each player's Main_Predict with INFERENCE_BACKEND = "remote" (and REMOTE_ADDRESS
+# set to match --socket / --port): their windows are batched together into one
+# forward pass per batch_budget instead of one each. Predictors normalizing for a
+# different training run than --tag are refused when they connect.
+#
+# --load-test N [N ...] instead starts the server with N simulated players
+# hammering it (no board needed) and reports throughput and round-trip times.
+
+# Define directory structure (same as above)
+BASE_DIR = "EMG Files"
+
+# Training run whose model is served (must match the predictors' MODEL_TAG)
+MODEL_TAG = "3(TEMPLATES_TEST)"
+BACKEND = "onnx"
+ACTIVE_CHANNELS = [0]  # EMG channels to use
+
+BATCH_BUDGET_MS = 2.0  # Longest a window waits for others to join its batch
+MAX_BATCH = 64         # Windows that make a batch run immediately
+LOAD_TEST_SECONDS = 3.0
+
+
+#===================================================================================================
+def parse_address(args):
+    if args.port is not None:
+        return ('127.0.0.1', args.port)
+    return args.socket or default_address()
+
+
+def load_test_client(address, model_tag, window_size, n_channels, seconds, ready, start, results):
+    """One simulated player: sends a window as soon as the previous answer arrived."""
+    backend = RemoteBackend(address, model_tag)
+    window = np.random.default_rng().standard_normal((1, window_size, n_channels)).astype(np.float32)
+    backend.predict(window)
+    ready.wait()
+    start.wait()
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while (sent := time.perf_counter()) < deadline:
+        backend.predict(window)
+        latencies.append((time.perf_counter() - sent) * 1e6)
+    backend.close()
+    results.put(latencies)
+
+
+def direct_rate(backend, window_size, n_channels, seconds):
+    """Windows per second the backend manages one at a time in this process."""
+    window = np.zeros((1, window_size, n_channels), dtype=np.float32)
+    backend.predict(window)
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        backend.predict(window)
+        count += 1
+    return count / seconds
+
+
+def load_test(server, sessions, seconds):
+    """Run each session count against the server and print one line per count."""
+    window_size, n_channels = server.window_size, server.n_channels
+    print(f"One window at a time, in process: {direct_rate(server.backend, window_size, n_channels, seconds):.0f}"
+          " windows/s\n")
+    print(f"{'sessions':>8} {'windows/s':>10} {'mean batch':>10} {'p50 us':>8} {'p99 us':>8}")
+    for n in sessions:
+        ready = mp.Barrier(n + 1)
+        start = mp.Event()
+        results = mp.Queue()
+        clients = [mp.Process(target=load_test_client, daemon=True,
+                              args=(server.address, server.model_tag, window_size, n_channels, seconds, ready, start, results))
+                   for _ in range(n)]
+        for client in clients:
+            client.start()
+        ready.wait()
+        batches, windows = server.batches, server.windows
+        start.set()
+        latencies = np.concatenate([results.get() for _ in clients])
+        for client in clients:
+            client.join()
+        summary = latency_summary(latencies)
+        print(f"{n:>8} {len(latencies) / seconds:>10.0f} "
+              f"{(server.windows - windows) / max(server.batches - batches, 1):>10.1f} "
+              f"{summary['p50_us']:>8.0f} {summary['p99_us']:>8.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve one model to many predictors, micro-batching their windows.")
+    parser.add_argument("--tag", default=MODEL_TAG, help="Training run to serve")
+    parser.add_argument("--backend", default=BACKEND, choices=["keras", "onnx", "numpy"])
+    parser.add_argument("--socket", help=f"Unix socket path (default: {default_address()})")
+    parser.add_argument("--port", type=int, help="Listen on TCP 127.0.0.1:<port> instead of a Unix socket")
+    parser.add_argument("--budget-ms", type=float, default=BATCH_BUDGET_MS,
+                        help="Longest a window waits for others to join its batch")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="Windows that make a batch run immediately")
+    parser.add_argument("--load-test", type=int, nargs="+", metavar="SESSIONS",
+                        help="Measure throughput with this many simulated players (several counts allowed)")
+    parser.add_argument("--seconds", type=float, default=LOAD_TEST_SECONDS, help="Duration of each load test")
+    args = parser.parse_args()
+
+    artifacts = ModelArtifacts(BASE_DIR, args.tag)
+    n_channels = len(ACTIVE_CHANNELS)
+    server = InferenceServer(artifacts.load_backend(args.backend, n_channels), artifacts.window_size, n_channels,
+                             parse_address(args), args.budget_ms / 1000, args.max_batch, args.tag)
+
+    async def serve(started):
+        await server.start()
+        started.set()
+        await server.serve_forever()
+
+    if not args.load_test:
+        print(f"Serving {args.tag} ({args.backend}) on {server.address}, "
+              f"batch budget {args.budget_ms} ms, max batch {args.max_batch}")
+        try:
+            asyncio.run(serve(threading.Event()))
+        except KeyboardInterrupt:
+            print(f"\nStopped after {server.windows} windows in {server.batches} batches "
+                  f"(mean batch {server.mean_batch_size:.1f})")
+        return
+
+    # The server runs on its own thread; this one drives the simulated players
+    started = threading.Event()
+    threading.Thread(target=asyncio.run, args=(serve(started),), daemon=True).start()
+    started.wait()
+    load_test(server, args.load_test, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,50 @@
-import numpy as np
-from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds
-from brainflow.data_filter import DataFilter, FilterTypes
-from scipy.signal import iirnotch, filtfilt, butter, lfilter, welch
-import logging
-import joblib
 import time
-from collections import deque
-import tensorflow as tf
+LAUNCH_TIME = time.perf_counter()  # startup timing is measured from here
+
+import argparse
 import os
-import matplotlib.pyplot as plt
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from emg_core.artifacts import ModelArtifacts
+from emg_core.boards import add_board_arguments
+from emg_core.ring_buffer import RingBuffer
+from emg_core.live_plot import LivePlotter
+from emg_core.metrics import PipelineMetrics, NullMetrics
+from emg_core.spectral import SpectralMonitor
+from emg_core.startup import StartupTimer
+# brainflow, scipy and the inference runtime are imported in main(), in parallel
 
 # Define directory structure (same as above)
 BASE_DIR = "EMG Files"
-MODEL_DIR = os.path.join(BASE_DIR, "Model Files")
-ENCODER_DIR = os.path.join(BASE_DIR, "Encoder Files")
-NORM_DIR = os.path.join(BASE_DIR, "Normalization Files")
-TEMPLATE_DIR = os.path.join(BASE_DIR, "Templates")                                      #plt
 SAVE_DIR = os.path.join(BASE_DIR, "Visualizations")
-os.makedirs(SAVE_DIR, exist_ok=True)
 
-# Load files from appropriate directories
-model = tf.keras.models.load_model(os.path.join(MODEL_DIR, "emg_cnn_model_3(TEMPLATES_TEST).keras"))
-label_encoder = joblib.load(os.path.join(ENCODER_DIR, "emg_label_encoder_3(TEMPLATES_TEST).pkl"))
-norm_params = joblib.load(os.path.join(NORM_DIR, "emg_normalization_3(TEMPLATES_TEST).pkl"))
-propulsion_template = np.load(os.path.join(TEMPLATE_DIR, "propulsion_template(TEMPLATES_TEST).npy"))    #plt
-rest_template = np.load(os.path.join(TEMPLATE_DIR, "rest_template(TEMPLATES_TEST).npy"))                #plt
+# Training run whose model, encoder, normalization and templates are used
+MODEL_TAG = "3(TEMPLATES_TEST)"
+TEMPLATE_TAG = "TEMPLATES_TEST"
 
+# Live plot runs in its own process; it never slows down predictions
+PLOT_FPS = 10                # Max redraws per second
+SNAPSHOT_INTERVAL = 5.0      # Seconds between PNG snapshots (None = no automatic snapshots)
+
+# Inference backend: "onnx" (ONNX Runtime), "numpy" (exported .npz weights), "keras"
+# or "remote" (batched with other players' windows by a running Main_InferenceServer)
+INFERENCE_BACKEND = "onnx"
+# Main_InferenceServer to use with "remote": its --socket path or ("127.0.0.1", its --port)
+# (None = the server's default address). It must serve MODEL_TAG.
+REMOTE_ADDRESS = None
+# Reuse conv activations between ticks instead of re-running the whole window (uses the .npz weights)
+INCREMENTAL_INFERENCE = False
+# Inferences run on a dummy window at startup so the first real one is not slow
+WARMUP_RUNS = 3
 
 ACTIVE_CHANNELS = [0]  # EMG channels to use
 
-X_mean = norm_params['mean'].squeeze()  # Remove extra dimensions
-X_std = norm_params['std'].squeeze()  # Remove extra dimensions
-window_size = norm_params['window_size']
-propulsion_template = propulsion_template[:window_size]                                 #plt
-rest_template = rest_template[:window_size]                                             #plt
+LOOP_INTERVAL = 0.05     # Seconds slept between ticks; a tick working longer than this is an overrun
+# Per-stage timings and counters (False = every instrumentation call is a no-op)
+METRICS = True
+STATUS_INTERVAL = 1.0    # Seconds between status lines
+METRICS_PORT = None      # e.g. 9108 to serve the metrics as JSON on http://127.0.0.1:9108/metrics
+SPECTRUM_TIME_CONSTANT = 2.0  # Seconds of signal the running band-power estimate averages over
 
 # Map numeric predictions to gesture names
 GESTURES = {
@@ -41,168 +52,99 @@ GESTURES = {
     1: "Rest"
     }
 
-def apply_notch_filter(data, fs, notch_freq=60.0, quality_factor=30.0):
-    """
-    Apply a notch filter to remove powerline noise (e.g., 60 Hz).
-    Args:
-        data: 1D array of signal data
-        fs: Sampling frequency (Hz)
-        notch_freq: Frequency to remove (Hz)
-        quality_factor: Quality factor for the notch filter
-    Returns:
-        Filtered signal
-    """
-    x = np.asarray(data, dtype=float).ravel()
-    b, a = iirnotch(notch_freq, quality_factor, fs)
-    padlen_needed = 3 * (max(len(a), len(b)) - 1)
-    if x.size <= padlen_needed:
-        return lfilter(b, a, x)
-    return filtfilt(b, a, x)
-
-def apply_highpass_filter(data, fs, cutoff=20.0, order=4):
-    """
-    Apply a highpass filter to remove low-frequency noise and motion artifacts.
-    This is more appropriate for low sampling rates.
-    """
-    x = np.asarray(data, dtype=float).ravel()
-    nyq = 0.5 * fs
-    high = cutoff / nyq
-    b, a = butter(order, high, btype='high')
-    padlen_needed = 3 * (max(len(a), len(b)) - 1)
-    if x.size <= padlen_needed:
-        return lfilter(b, a, x)
-    return filtfilt(b, a, x)
-
-def analyze_signal_frequency(signal, fs):
-    """
-    Analyze the frequency content of a signal using Welch's method.
-    Returns dominant frequency and power spectrum info.
-    """
-    # Use Welch's method to estimate power spectral density
-    freqs, psd = welch(signal, fs=fs, nperseg=min(256, len(signal)))
-    
-    # Find dominant frequency (excluding DC component)
-    dominant_idx = np.argmax(psd[1:]) + 1  # Skip DC (0 Hz)
-    dominant_freq = freqs[dominant_idx]
-    
-    # Calculate power in different frequency bands
-    def band_power(freqs, psd, fmin, fmax):
-        idx = np.logical_and(freqs >= fmin, freqs <= fmax)
-        return np.trapezoid(psd[idx], freqs[idx])
-    
-    total_power = np.trapezoid(psd, freqs)
-    low_freq_power = band_power(freqs, psd, 0, 20)  # 0-20 Hz (motion artifacts)
-    emg_power = band_power(freqs, psd, 20, 90)  # 20-90 Hz (useful EMG)
-    high_freq_power = band_power(freqs, psd, 90, fs/2)  # Above 90 Hz
-    
-    return {
-        'dominant_freq': dominant_freq,
-        'total_power': total_power,
-        'low_freq_power': low_freq_power,
-        'emg_power': emg_power,
-        'high_freq_power': high_freq_power,
-        'low_freq_percent': (low_freq_power / total_power) * 100,
-        'emg_percent': (emg_power / total_power) * 100,
-        'high_freq_percent': (high_freq_power / total_power) * 100
-    }
+#===================================================================================================
+def load_models(artifacts, n_channels, timer):
+    """Load the classifier, templates and optional incremental model, then warm them up."""
+    with timer.stage("load classifier"):
+        classifier = artifacts.load_classifier(INFERENCE_BACKEND, n_channels, GESTURES, REMOTE_ADDRESS)
+    with timer.stage("load templates"):
+        templates = {
+            "Propulsion": artifacts.template("propulsion"),                             #plt
+            "Rest": artifacts.template("rest"),                                         #plt
+        }
+
+    # Incremental CNN state, fed with every new normalized sample
+    incremental_model = None
+    if INCREMENTAL_INFERENCE:
+        with timer.stage("load incremental model"):
+            from emg_core.numpy_cnn import NumpyCNN, IncrementalCNN
+            cnn = NumpyCNN.from_npz(artifacts.model_path("numpy"))
+            incremental_model = IncrementalCNN(cnn, artifacts.window_size)
+
+    with timer.stage("warm-up inference"):
+        dummy = np.zeros((artifacts.window_size, n_channels))
+        for _ in range(WARMUP_RUNS):
+            classifier.predict(dummy)
+        if incremental_model is not None:
+            incremental_model.update(dummy)
+            incremental_model.reset()
+    return classifier, templates, incremental_model
+
+
+def import_preprocessing(timer):
+    with timer.stage("import scipy filters"):
+        from emg_core import preprocessing
+    return preprocessing
+
+
+def open_board(args, timer):
+    with timer.stage("import brainflow"):
+        from emg_core.boards import open_board_from_args
+    with timer.stage("prepare board session"):
+        board = open_board_from_args(args)
+    with timer.stage("start stream"):
+        try:
+            board.start_stream()
+        except BaseException:
+            board.release_session()
+            raise
+    return board
 
-def predict_gesture(window):
-    """
-    Predict gesture from a window of EMG data.
-    Args:
-        window: numpy array of shape (window_size, n_channels)
-    Returns:
-        Predicted gesture name and confidence
-    """
-    # Ensure window is the right shape
-    window = np.array(window)
-    if window.ndim != 2:
-        raise ValueError(f"Window must be 2D, got shape {window.shape}")
-    
-    # Normalize using training statistics
-    window_normalized = (window - X_mean) / (X_std + 1e-8)
-    
-    # Add batch dimension: (window_size, n_channels) -> (1, window_size, n_channels)
-    window_batch = window_normalized.reshape(1, window_size, -1)
-    
-    # Predict
-    predictions = model.predict(window_batch, verbose=0)[0]
-    predicted_class = int(np.argmax(predictions))
-    confidence = float(predictions[predicted_class])
-    
-    # Get gesture name
-    gesture_label = label_encoder.inverse_transform([predicted_class])[0]
-    gesture_name = GESTURES.get(int(gesture_label), f"Unknown ({gesture_label})")
-    
-    return gesture_name, confidence, predictions
-
-#===============================================================================================
-def setup_plot():
-    """
-    Create an interactive matplotlib plot showing:
-    - current filtered EMG window
-    - expected template for a gesture
-    """
-    plt.ion()  # interactive mode
-    fig, ax = plt.subplots()
-    input_line, = ax.plot([], [], label="Current EMG window")
-    template_line, = ax.plot([], [], label="Expected template")
-    ax.set_xlabel("Sample")
-    ax.set_ylabel("Amplitude (μV)")
-    ax.set_title("EMG Window vs Expected Template")
-    ax.legend()
-    return fig, ax, input_line, template_line
-
-
-def update_plot(window_1d, template_1d, input_line, template_line, ax, gesture_name):
-    """
-    Update the existing plot with new data.
-    window_1d: 1D numpy array of current filtered EMG for one channel
-    template_1d: 1D numpy array of expected EMG for comparison
-    """
-    n = len(window_1d)
-    t = np.arange(n)
-
-    input_line.set_data(t, window_1d)
-    template_line.set_data(t, template_1d[:n])
-
-    ax.relim()           # recompute limits
-    ax.autoscale_view()  # rescale axes
-    plt.draw()
-    plt.pause(0.001)     # small pause so GUI can update
-
-    save_dir = os.path.join("EMG Files", "Visualizations")
-    os.makedirs(save_dir, exist_ok=True)
-
-    plt.figure()
-    plt.plot(window_1d, label="Current EMG window")
-    plt.plot(template_1d, label="Template")
-    plt.xlabel("Sample Index")
-    plt.ylabel("Normalized Amplitude")
-    plt.title(f"Live EMG vs {gesture_name} Template")
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(os.path.join(save_dir, f"{gesture_name.lower()}_comparison.png"), dpi=300)
-    plt.close()
 
-#===================================================================================================
 def main():
-    BoardShim.enable_dev_board_logger()
-    logging.basicConfig(level=logging.INFO)
-
-    params = BrainFlowInputParams()
-    params.serial_port = "COM4"
-    params.timeout = 15
-    params.master_board = BoardIds.GANGLION_NATIVE_BOARD
-        
-    board = BoardShim(params.master_board, params)
-    board.prepare_session()
-    board.start_stream()
+    timer = StartupTimer(LAUNCH_TIME)
+    parser = argparse.ArgumentParser(description="Real-time gesture prediction.")
+    add_board_arguments(parser)
+    parser.add_argument("--no-metrics", dest="metrics", action="store_false", default=METRICS,
+                        help="Switch off per-stage timing")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                        help="Serve metrics as JSON on http://127.0.0.1:<port>/metrics")
+    args = parser.parse_args()
+    os.makedirs(SAVE_DIR, exist_ok=True)
+    n_channels = len(ACTIVE_CHANNELS)
 
+    # === Start the live plot process (imports matplotlib on its own) ===
+    plotter = LivePlotter(SAVE_DIR, max_fps=PLOT_FPS, snapshot_interval=SNAPSHOT_INTERVAL)
+    plotter.start()
+
+    # Artifacts are read and the model warmed up while the board connects
+    artifacts = ModelArtifacts(BASE_DIR, MODEL_TAG, TEMPLATE_TAG)
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup") as pool:
+        models_future = pool.submit(load_models, artifacts, n_channels, timer)
+        preprocessing_future = pool.submit(import_preprocessing, timer)
+        board = None
+        try:
+            board = open_board(args, timer)
+            classifier, templates, incremental_model = models_future.result()
+            preprocessing = preprocessing_future.result()
+        except BaseException:
+            # The pool still waits for the loads in flight; nothing queued behind them runs
+            pool.shutdown(cancel_futures=True)
+            if board is not None:
+                board.stop_stream()
+                board.release_session()
+            plotter.close()
+            raise
+    window_size = artifacts.window_size
+
+    from brainflow.board_shim import BoardShim
+    from emg_core.acquisition import BoardReader, active_emg_channels
     emg_channels = BoardShim.get_emg_channels(board.get_board_id())
-    active_channel_indices = [emg_channels[i] for i in ACTIVE_CHANNELS]
+    active_channel_indices = active_emg_channels(board, ACTIVE_CHANNELS)
     sampling_rate = board.get_sampling_rate(board.get_board_id())
-    n_channels = len(ACTIVE_CHANNELS)
+
+    # Hands each sample to the pipeline exactly once
+    reader = BoardReader(board, active_channel_indices)
     
     print(f"EMG channels: {emg_channels}")
     print(f"Sampling rate: {sampling_rate} Hz")
@@ -211,50 +153,73 @@ def main():
     print("\nStarting real-time prediction with signal analysis...")
     print("Press Ctrl+C to stop.\n")
 
+    # Causal highpass + notch; designed once, state carried across ticks
+    stream_filter = preprocessing.StreamingFilter(sampling_rate, n_channels)
+    # Band powers of the raw and filtered streams, estimated on their own threads
+    raw_spectrum = SpectralMonitor(sampling_rate, n_channels, time_constant=SPECTRUM_TIME_CONSTANT)
+    filtered_spectrum = SpectralMonitor(sampling_rate, n_channels, time_constant=SPECTRUM_TIME_CONSTANT)
+    timer.mark("ready, waiting for first window")
 
-    # === Set up matplotlib live plot ===
-    fig, ax, input_line, template_line = setup_plot()
+    # Preallocated buffers to store incoming raw and filtered data (float32, like the model)
+    data_buffer = RingBuffer(n_channels, window_size, dtype=np.float32)
+    filtered_buffer = RingBuffer(n_channels, window_size, dtype=np.float32)
 
-    # Buffer to store incoming data
-    data_buffer = deque(maxlen=window_size)
+    metrics = PipelineMetrics(LOOP_INTERVAL) if args.metrics else NullMetrics()
+    metrics_server = None
+    if args.metrics and args.metrics_port is not None:
+        metrics_server = metrics.serve(args.metrics_port)
+        print(f"Metrics on http://127.0.0.1:{args.metrics_port}/metrics")
     
-    # Counter for periodic detailed analysis
-    analysis_counter = 0
-    ANALYSIS_INTERVAL = 20  # Print detailed analysis every N predictions
+    first_prediction_done = False
+    gesture_name, confidence = None, 0.0
+    last_status = time.perf_counter()
     
     try:
         while True:
-            # Get recent data
-            data = board.get_current_board_data(200)
+            metrics.start_tick()
+            # Get only the samples that arrived since the last tick
+            data = reader.read()
+            metrics.lap("read")
             
-            if data.shape[1] > 0:
-                # Extract EMG data and add to buffer
-                for i in range(data.shape[1]):
-                    sample = data[active_channel_indices, i]
-                    data_buffer.append(sample)
+            if data.shape[1] == 0:
+                # Polled before the board delivered anything new
+                metrics.count("underruns")
+            else:
+                # Filter only the new samples and add to buffers
+                # data has shape (n_channels, n_samples)
+                filtered_samples = stream_filter.process(data.T)
+                metrics.lap("filter")
+                data_buffer.extend(data)
+                filtered_buffer.extend(filtered_samples.T)
+                metrics.lap("buffer")
+                raw_spectrum.push(data.T)
+                filtered_spectrum.push(filtered_samples)
+                metrics.lap("spectrum")
+                if incremental_model is not None:
+                    # One row of probabilities per new sample that completes a window
+                    step_probs = incremental_model.update(classifier.normalize(filtered_samples))
+                    metrics.lap("inference")
                 
                 # Once we have enough data, make prediction
                 if len(data_buffer) >= window_size:
-                    # Convert buffer to array
-                    window = np.array(list(data_buffer)[-window_size:])  # Shape: (window_size, n_channels)
+                    # Filtered samples were produced incrementally as they arrived
+                    filtered_window = filtered_buffer.latest(window_size).T
                     
-                    # Raw signal statistics
-                    raw_min = np.min(window)
-                    raw_max = np.max(window)
-                    raw_mean = np.mean(window)
-                    raw_std = np.std(window)
-                    
-                    # Apply filters to each channel
-                    filtered_window = np.zeros_like(window)
-                    for ch_idx in range(window.shape[1]):
-                        filtered_window[:, ch_idx] = apply_highpass_filter(
-                            window[:, ch_idx], sampling_rate
-                        )
-                        filtered_window[:, ch_idx] = apply_notch_filter(
-                            filtered_window[:, ch_idx], sampling_rate
-                        )
-                    
-                    gesture_name, confidence, all_probs = predict_gesture(filtered_window)
+                    if incremental_model is not None:
+                        probabilities = step_probs[-1]
+                    else:
+                        # Normalized in place into the preallocated model input
+                        batch = classifier.prepare(filtered_window)
+                        metrics.lap("normalize")
+                        probabilities = classifier.backend.predict(batch)[0]
+                        metrics.lap("inference")
+                    gesture_name, confidence, _ = classifier.decode(probabilities)
+                    metrics.lap("decision")
+
+                    if not first_prediction_done:
+                        timer.mark("first prediction")
+                        print(timer.report() + "\n")
+                        first_prediction_done = True
 
                     # === Update live plot: current window vs expected template ===
                     # Choose which channel to visualize (here: first active channel)
@@ -262,66 +227,52 @@ def main():
                     current_window_1d = filtered_window[:, channel_to_plot]
 
                     # Pick template based on predicted gesture name
-                    if gesture_name == "Propulsion":
-                        template_1d = propulsion_template[:, channel_to_plot]
-                    elif gesture_name == "Rest":
-                        template_1d = rest_template[:, channel_to_plot]
+                    if gesture_name in templates:
+                        template_1d = templates[gesture_name][:, channel_to_plot]
                     else:
                         template_1d = np.zeros_like(current_window_1d)
 
-                    print(
-                        f"\ncur range [{current_window_1d.min():.2f}, {current_window_1d.max():.2f}], "
-                        f"template range [{template_1d.min():.2f}, {template_1d.max():.2f}]"
-                    )
-
-                    update_plot(current_window_1d, template_1d,
-                                input_line, template_line, ax, gesture_name)
+                    plotter.submit(current_window_1d, template_1d, gesture_name)
+                    metrics.lap("plot")
                     # ===========================================================
-                    
-                    # Periodic detailed frequency analysis
-                    analysis_counter += 1
-                    if analysis_counter % ANALYSIS_INTERVAL == 0:
-                        print("\n" + "="*80)
-                        print("DETAILED SIGNAL ANALYSIS")
-                        print("="*80)
-                        
-                        # Analyze each channel
-                        for ch_idx in range(window.shape[1]):
-                            print(f"\nChannel {ch_idx + 1}:")
-                            print(f"  Raw Signal:")
-                            print(f"    Range: [{np.min(window[:, ch_idx]):.2f}, {np.max(window[:, ch_idx]):.2f}]")
-                            print(f"    Mean: {np.mean(window[:, ch_idx]):.2f}, Std: {np.std(window[:, ch_idx]):.2f}")
-                            
-                            # Frequency analysis on raw signal
-                            freq_info = analyze_signal_frequency(window[:, ch_idx], sampling_rate)
-                            print(f"  Frequency Content (Raw):")
-                            print(f"    Dominant frequency: {freq_info['dominant_freq']:.1f} Hz")
-                            print(f"    Power distribution:")
-                            print(f"      0-20 Hz (artifacts): {freq_info['low_freq_percent']:.1f}%")
-                            print(f"      20-90 Hz (EMG):      {freq_info['emg_percent']:.1f}%")
-                            print(f"      90-100 Hz (high):    {freq_info['high_freq_percent']:.1f}%")
-                            
-                            # Frequency analysis on filtered signal
-                            freq_info_filt = analyze_signal_frequency(filtered_window[:, ch_idx], sampling_rate)
-                            print(f"  Frequency Content (Filtered):")
-                            print(f"    Dominant frequency: {freq_info_filt['dominant_freq']:.1f} Hz")
-                            print(f"    EMG band power: {freq_info_filt['emg_percent']:.1f}%")
-                        
-                        print("="*80 + "\n")
-                    
-                    # Display prediction with signal stats
-                    print(f"\rPredicted: {gesture_name:10s} | Conf: {confidence:.2%} | "
-                          f"Raw: [{raw_min:6.1f}, {raw_max:6.1f}] μ={raw_mean:6.1f} σ={raw_std:5.1f} | "
-                          f"[P:{all_probs[0]:.2f} R:{all_probs[1]:.2f}]", 
-                          end='', flush=True)
+            metrics.end_tick()
+
+            # Compact status line instead of printing every prediction
+            now = time.perf_counter()
+            if now - last_status >= STATUS_INTERVAL and gesture_name is not None:
+                last_status = now
+                metrics.set("dropped_packets", reader.dropped_packets)
+                metrics.set("plot_dropped", plotter.dropped_frames)
+                status = f"Predicted: {gesture_name:10s} | Conf: {confidence:.2%}"
+                raw_bands, filtered_bands = raw_spectrum.latest, filtered_spectrum.latest
+                if raw_bands is not None and filtered_bands is not None:
+                    # 20-90 Hz share of the power and dominant frequency, per channel
+                    status += " | EMG band " + ", ".join(
+                        f"{filtered_bands['emg_percent'][ch]:.0f}% (raw {raw_bands['emg_percent'][ch]:.0f}%, "
+                        f"{filtered_bands['dominant_freq'][ch]:.0f} Hz)" for ch in range(n_channels))
+                if args.metrics:
+                    status += f" | {metrics.report_line()}"
+                else:
+                    status += f" | Dropped: {reader.dropped_packets}"
+                print(status, flush=True)
             
-            # Control loop speed
-            time.sleep(0.05)
+            # A finished replay has nothing more to deliver
+            if getattr(board, "finished", False):
+                break
+
+            # Control loop speed (a max-speed replay is paced by the loop itself)
+            if args.speed != "max":
+                time.sleep(LOOP_INTERVAL)
 
     except KeyboardInterrupt:
         print("\n\nStopping stream...")
 
     finally:
+        raw_spectrum.close()
+        filtered_spectrum.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        plotter.close()
         board.stop_stream()
         board.release_session()
         print(" Stream stopped and session released.")
@@ -1,42 +1,46 @@
+import argparse
 import os
+import time
 import numpy as np
-import tensorflow as tf
-import tf2onnx
 import onnx
+from onnx import helper, numpy_helper
+from emg_core.artifacts import ModelArtifacts
+# tensorflow and tf2onnx are imported in rebuild_and_convert(), only when rebuilding from weights;
+# onnxruntime only for --check and --quantize
 
 # Match original directory setup
 BASE_DIR = "EMG Files"
 MODEL_DIR = os.path.join(BASE_DIR, "Model Files")
+SIGNAL_DIR = os.path.join(BASE_DIR, "Signal Files")
+REPORT_DIR = os.path.join(BASE_DIR, "Benchmarks")
 
-# Files from training / export steps
-WEIGHTS_FILENAME = "emg_cnn_weights_4(new_electrode_placement).npz"
-ONNX_FILENAME    = "emg_cnn_model_4(new_electrode_placement).onnx"
+# Training run to export (weights from Main_ExportWeights.py)
+MODEL_TAG = "4(new_electrode_placement)"
 
-# match training script
-WINDOW_SIZE = 100  # from train_model.py: window_size = 100
+# Files from training / export steps:
+#   emg_cnn_weights_<tag>.npz         -> emg_cnn_model_<tag>.onnx
+#   with --fold-normalization / --fold-filter also emg_cnn_model_<tag>_pipeline.onnx
+#   with --quantize also emg_cnn_model_<tag>_int8.onnx
 
-weights_path = os.path.join(MODEL_DIR, WEIGHTS_FILENAME)
-onnx_path    = os.path.join(MODEL_DIR, ONNX_FILENAME)
+# Window size and sampling rate come from the run's normalization file (see Main_Train.py)
+DEFAULT_SAMPLING_RATE = 200   # Ganglion; used when the run or recording does not store its rate
+FIR_TAPS = 127        # ~0.4% rms from the live IIR filter at 200 Hz (63 taps: ~3%)
+CHECK_RECORDING = "emg_signals_4(new_electrode_placement).csv"
+CHECK_WARMUP = 400    # samples skipped by --check while the live filter settles
 
-print("Loading weights from:")
-print(" ", weights_path)
-data = np.load(weights_path)
+# INT8 post-training quantization
+CALIBRATION_WINDOWS = 512   # windows spread over the calibration recording
+CALIBRATION_BATCH = 64
+CALIBRATION_FRACTION = 0.5  # of a recording used for both: calibrate on this part, report on the rest
+REPORT_STRIDE = 10          # samples between report windows, as live ticks
+LATENCY_RUNS = 2000         # single-window calls timed per model
+REPORT_BATCH = 256
 
-# Ensure consistent ordering of arrays: arr_0, arr_1, ...
-keys_sorted = sorted(data.files, key=lambda k: int(k.split('_')[1]))
-weights_list = [data[k] for k in keys_sorted]
-
-print(f"Loaded {len(weights_list)} weight arrays.")
-
-# Infer n_channels from first Conv1D kernel: shape = (kernel_size, in_channels, filters)
-first_kernel = weights_list[0]
-kernel_size, n_channels, n_filters = first_kernel.shape
-print(f"Inferred from first Conv1D kernel: kernel_size={kernel_size}, n_channels={n_channels}, filters={n_filters}")
-
-# Infer number of classes from final Dense bias: shape = (n_classes,)
-last_bias = weights_list[-1]
-n_classes = last_bias.shape[0]
-print(f"Inferred number of classes from final bias: n_classes={n_classes}")
+# Map numeric predictions to gesture names
+GESTURES = {
+    0: "Propulsion",
+    1: "Rest"
+    }
 
 
 def build_cnn_model(input_shape, n_classes):
@@ -59,6 +63,7 @@ def build_cnn_model(input_shape, n_classes):
             Dense(n_classes, activation='softmax')
         ])
     """
+    import tensorflow as tf
     keras = tf.keras
     layers = keras.layers
 
@@ -90,32 +95,377 @@ def build_cnn_model(input_shape, n_classes):
     return model
 
 
-print("\nRebuilding CNN architecture...")
-input_shape = (WINDOW_SIZE, n_channels)  # (time_steps, channels)
-model = build_cnn_model(input_shape, n_classes)
-model.summary()
+def rebuild_and_convert(weights_path, window_size):
+    """Rebuild the Keras model from exported weights and convert it to ONNX."""
+    import tensorflow as tf
+    import tf2onnx
+
+    print("Loading weights from:")
+    print(" ", weights_path)
+    data = np.load(weights_path)
+
+    # Ensure consistent ordering of arrays: arr_0, arr_1, ...
+    keys_sorted = sorted(data.files, key=lambda k: int(k.split('_')[1]))
+    weights_list = [data[k] for k in keys_sorted]
+
+    print(f"Loaded {len(weights_list)} weight arrays.")
+
+    # Infer n_channels from first Conv1D kernel: shape = (kernel_size, in_channels, filters)
+    first_kernel = weights_list[0]
+    kernel_size, n_channels, n_filters = first_kernel.shape
+    print(f"Inferred from first Conv1D kernel: kernel_size={kernel_size}, n_channels={n_channels}, filters={n_filters}")
+
+    # Infer number of classes from final Dense bias: shape = (n_classes,)
+    last_bias = weights_list[-1]
+    n_classes = last_bias.shape[0]
+    print(f"Inferred number of classes from final bias: n_classes={n_classes}")
 
-print("\nSetting weights...")
-model.set_weights(weights_list)
-print("Weights loaded successfully.")
+    print("\nRebuilding CNN architecture...")
+    input_shape = (window_size, n_channels)  # (time_steps, channels)
+    model = build_cnn_model(input_shape, n_classes)
+    model.summary()
 
-# ==== Convert to ONNX ====
-print("\nConverting model to ONNX...")
+    print("\nSetting weights...")
+    model.set_weights(weights_list)
+    print("Weights loaded successfully.")
 
-input_signature = [
-    tf.TensorSpec(
-        shape=(None, WINDOW_SIZE, n_channels),
-        dtype=tf.float32,
-        name="emg",   # input name for Unity/Barracuda
+    # ==== Convert to ONNX ====
+    print("\nConverting model to ONNX...")
+
+    input_signature = [
+        tf.TensorSpec(
+            shape=(None, window_size, n_channels),
+            dtype=tf.float32,
+            name="emg",   # input name for Unity/Barracuda
+        )
+    ]
+
+    onnx_model, _ = tf2onnx.convert.from_keras(
+        model,
+        input_signature=input_signature,
+        opset=11  # safe choice for Unity/Barracuda
     )
-]
+    return onnx_model
+
+
+def fir_from_filter(fs, taps):
+    """
+    FIR approximation of the live highpass + notch (preprocessing.StreamingFilter):
+    its impulse response cut to taps samples, shifted to keep the DC gain exactly
+    zero so a raw signal's offset is still removed.
+    """
+    from scipy.signal import sosfilt
+    from emg_core.preprocessing import design_emg_sos
+    impulse = np.zeros(taps)
+    impulse[0] = 1.0
+    fir = sosfilt(design_emg_sos(fs), impulse)
+    return fir - fir.mean()
+
+
+def fold_preprocessing(model, sampling_rate, mean=None, std=None, fir=None):
+    """
+    Prepend preprocessing to an exported model so it takes raw samples.
+
+        raw (batch, W + taps - 1, C) -> FIR as a 'valid' depthwise Conv
+            -> (x - mean) / (std + 1e-8) -> original model
+
+    The input keeps its name ("emg"); the original input becomes internal.
+    Args:
+        model: onnx.ModelProto with one (batch, W, C) float input
+        sampling_rate: Rate (Hz) the filter was designed for, stored in the model metadata
+        mean, std: Per-channel training statistics, None = no normalization
+        fir: FIR coefficients applied causally to each channel, None = no filter
+    """
+    graph = model.graph
+    model_input = graph.input[0]
+    name = model_input.name
+    batch_dim, window_dim, channel_dim = model_input.type.tensor_type.shape.dim
+    n_channels = channel_dim.dim_value
+    internal = f"{name}_preprocessed"
+    for node in graph.node:
+        node.input[:] = [internal if i == name else i for i in node.input]
+
+    nodes, initializers = [], []
+    current = name
+    if fir is not None:
+        # Conv is a correlation: reversed taps give y[t] = sum_k fir[k] * x[t - k]
+        kernel = np.tile(np.asarray(fir[::-1], dtype=np.float32), (n_channels, 1, 1))
+        initializers.append(numpy_helper.from_array(kernel, f"{name}_fir"))
+        nodes += [
+            helper.make_node("Transpose", [current], [f"{name}_ncw"], perm=[0, 2, 1]),
+            helper.make_node("Conv", [f"{name}_ncw", f"{name}_fir"], [f"{name}_filtered_ncw"],
+                             group=n_channels, kernel_shape=[len(fir)]),
+            helper.make_node("Transpose", [f"{name}_filtered_ncw"], [f"{name}_filtered"], perm=[0, 2, 1]),
+        ]
+        current = f"{name}_filtered"
+    if mean is not None:
+        mean = np.broadcast_to(np.asarray(mean, dtype=np.float32).squeeze(), (n_channels,))
+        std = np.broadcast_to(np.asarray(std, dtype=np.float32).squeeze(), (n_channels,))
+        initializers += [numpy_helper.from_array(np.ascontiguousarray(mean), f"{name}_mean"),
+                         numpy_helper.from_array(np.ascontiguousarray(std + np.float32(1e-8)), f"{name}_std")]
+        nodes += [
+            helper.make_node("Sub", [current, f"{name}_mean"], [f"{name}_centered"]),
+            helper.make_node("Div", [f"{name}_centered", f"{name}_std"], [internal]),
+        ]
+    else:
+        nodes.append(helper.make_node("Identity", [current], [internal]))
+
+    model_nodes = list(graph.node)
+    del graph.node[:]
+    graph.node.extend(nodes + model_nodes)
+    graph.initializer.extend(initializers)
+    window_size = window_dim.dim_value
+    input_length = window_size + (len(fir) - 1 if fir is not None else 0)
+    window_dim.dim_value = input_length
+
+    helper.set_model_props(model, {
+        "window_size": str(window_size),
+        "input_length": str(input_length),
+        "sampling_rate": str(sampling_rate),
+        "fir_taps": str(len(fir) if fir is not None else 0),
+        "normalization": "folded" if mean is not None else "host",
+    })
+    onnx.checker.check_model(model)
+    return model
+
+
+def check_pipeline(model, pipeline, recording, mean, std, taps, sampling_rate):
+    """
+    Compare the folded model on raw windows with the host-side path
+    (StreamingFilter + normalization + original model) on a recording.
+    sampling_rate is used when the recording does not store its own.
+    """
+    import onnxruntime as ort
+    from numpy.lib.stride_tricks import sliding_window_view
+    from emg_core.preprocessing import StreamingFilter
+    from emg_core.recording import load_recording
+
+    _, window_dim, channel_dim = model.graph.input[0].type.tensor_type.shape.dim
+    window_size = window_dim.dim_value
+    input_length = pipeline.graph.input[0].type.tensor_type.shape.dim[1].dim_value
+    session = load_recording(recording)
+    raw = np.asarray(session.signal, dtype=np.float32)[:, :channel_dim.dim_value]
+
+    # Host side as in Main_Predict: causal filter, then normalization
+    filtered = StreamingFilter(session.sampling_rate or sampling_rate, raw.shape[1]).process(raw)
+    normalized = (filtered - np.float32(np.squeeze(mean))) / np.float32(np.squeeze(std) + 1e-8) \
+        if mean is not None else filtered
+    # The folded model gets raw samples, or filtered ones if the filter stays on the host
+    pipeline_input = raw if taps else filtered
+
+    ends = np.arange(max(input_length, CHECK_WARMUP), len(raw) + 1, 10)
+    host_windows = sliding_window_view(normalized, window_size, axis=0)[ends - window_size].transpose(0, 2, 1)
+    pipeline_windows = sliding_window_view(pipeline_input, input_length, axis=0)[ends - input_length].transpose(0, 2, 1)
+
+    def run(onnx_model, windows):
+        sess = ort.InferenceSession(onnx_model.SerializeToString(), providers=["CPUExecutionProvider"])
+        return sess.run(None, {sess.get_inputs()[0].name: np.ascontiguousarray(windows, dtype=np.float32)})[0]
+
+    host, folded = run(model, host_windows), run(pipeline, pipeline_windows)
+    agreement = np.mean(np.argmax(host, axis=1) == np.argmax(folded, axis=1))
+    print(f"\nCheck on {recording} ({len(ends)} windows):")
+    print(f"  max |probability difference|: {np.max(np.abs(host - folded)):.5f}")
+    print(f"  same predicted class:         {agreement:.2%}")
+
+
+def recording_windows(classifier, recording, stride, portion=(0.0, 1.0)):
+    """
+    Normalized windows of a recording as the live predictor sees them, and their labels.
+    Args:
+        portion: (start, stop) fraction of the recording the windows must lie in
+    Returns:
+        (windows of shape (n, W, C), label of the last sample of each window)
+    """
+    from emg_core.evaluation import filtered_signal, stream_windows, window_ends, sample_labels
+    from emg_core.recording import load_recording
+    session = load_recording(recording)
+    signal = filtered_signal(session, session.sampling_rate or DEFAULT_SAMPLING_RATE)  # filter state runs through
+    part = slice(int(portion[0] * len(signal)), int(portion[1] * len(signal)))
+    normalized = classifier.normalize(signal[part, :classifier.backend.input_buffer.shape[2]])
+    ends = window_ends(len(normalized), classifier.window_size, stride)
+    return stream_windows(normalized, classifier.window_size, stride), sample_labels(session)[part][ends - 1]
+
+
+def quantize_int8(model_path, output_path, calibration_windows, quant_format="qdq"):
+    """
+    Static INT8 quantization with activation ranges calibrated on real windows.
+    Args:
+        model_path: float32 .onnx to quantize
+        output_path: Where the INT8 model is written
+        calibration_windows: array of shape (n, W, C), normalized like the live input
+        quant_format: "qdq" (QuantizeLinear/DequantizeLinear pairs, fused by ONNX Runtime)
+            or "qoperator" (QLinearConv etc.)
+    """
+    import tempfile
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    class WindowReader(CalibrationDataReader):
+        def __init__(self, input_name, windows):
+            self.batches = iter([{input_name: np.ascontiguousarray(windows[i:i + CALIBRATION_BATCH], dtype=np.float32)}
+                                 for i in range(0, len(windows), CALIBRATION_BATCH)])
+
+        def get_next(self):
+            return next(self.batches, None)
+
+    input_name = onnx.load(model_path).graph.input[0].name
+    with tempfile.TemporaryDirectory() as tmp:
+        # Shape inference and graph cleanup first, as ONNX Runtime recommends
+        prepared = os.path.join(tmp, "prepared.onnx")
+        quant_pre_process(model_path, prepared, skip_symbolic_shape=True)
+        quantize_static(prepared, output_path, WindowReader(input_name, calibration_windows),
+                        quant_format=QuantFormat.QDQ if quant_format == "qdq" else QuantFormat.QOperator,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+
+
+def model_report(backend, path, windows, labels, class_labels):
+    """Accuracy on labelled windows, file size and single/batch latency of one model."""
+    from emg_core.benchmark import latency_summary
+    from emg_core.evaluation import predict_batches
+
+    started = time.perf_counter()
+    probabilities = predict_batches(backend, windows, REPORT_BATCH)
+    batch_rate = len(windows) / (time.perf_counter() - started)
+
+    window = np.ascontiguousarray(windows[len(windows) // 2][np.newaxis], dtype=np.float32)
+    for _ in range(100):
+        backend.predict(window)
+    durations = []
+    for _ in range(LATENCY_RUNS):
+        t0 = time.perf_counter_ns()
+        backend.predict(window)
+        durations.append((time.perf_counter_ns() - t0) / 1e3)
+
+    predicted = np.asarray(class_labels)[np.argmax(probabilities, axis=1)]
+    labelled = np.isin(labels, class_labels)
+    return {
+        "path": path,
+        "size_bytes": os.path.getsize(path),
+        "accuracy": float(np.mean(predicted[labelled] == labels[labelled])),
+        "single_window": latency_summary(durations),
+        "batch_windows_per_s": batch_rate,
+    }, probabilities
+
+
+def quantization_report(artifacts, fp32_path, int8_path, recording, n_channels, portion=(0.0, 1.0)):
+    """Compare the float32 and INT8 models on (a portion of) a recording; prints and returns the report."""
+    from emg_core.backends import OnnxBackend
+    classifier = artifacts.load_classifier("onnx", n_channels, GESTURES)
+    windows, labels = recording_windows(classifier, recording, REPORT_STRIDE, portion)
+    fp32, fp32_probs = model_report(classifier.backend, fp32_path, windows, labels, classifier.class_labels)
+    int8_backend = OnnxBackend(int8_path, classifier.window_size, n_channels)
+    int8, int8_probs = model_report(int8_backend, int8_path, windows, labels, classifier.class_labels)
+    report = {
+        "tag": artifacts.tag,
+        "recording": recording,
+        "portion": list(portion),
+        "windows": len(windows),
+        "fp32": fp32,
+        "int8": int8,
+        "same_prediction": float(np.mean(np.argmax(fp32_probs, axis=1) == np.argmax(int8_probs, axis=1))),
+        "max_probability_difference": float(np.max(np.abs(fp32_probs - int8_probs))),
+    }
+
+    print(f"\nfp32 vs int8 on {recording} [{portion[0]:.0%}-{portion[1]:.0%}] ({len(windows)} windows):")
+    print(f"  {'':22s}{'fp32':>12s}{'int8':>12s}")
+    print(f"  {'accuracy':22s}{fp32['accuracy']:12.2%}{int8['accuracy']:12.2%}")
+    print(f"  {'size (KB)':22s}{fp32['size_bytes'] / 1024:12.1f}{int8['size_bytes'] / 1024:12.1f}")
+    for p in (50, 99):
+        print(f"  {f'single window p{p} (us)':22s}{fp32['single_window'][f'p{p}_us']:12.1f}"
+              f"{int8['single_window'][f'p{p}_us']:12.1f}")
+    print(f"  {f'batch {REPORT_BATCH} (windows/s)':22s}{fp32['batch_windows_per_s']:12,.0f}"
+          f"{int8['batch_windows_per_s']:12,.0f}")
+    print(f"  same prediction on {report['same_prediction']:.2%} of windows, "
+          f"max probability difference {report['max_probability_difference']:.4f}")
+    return report
+
+
+def quantize_and_report(args, model, onnx_path):
+    from emg_core.benchmark import save_results
+    artifacts = ModelArtifacts(BASE_DIR, args.tag)
+    n_channels = model.graph.input[0].type.tensor_type.shape.dim[2].dim_value
+    int8_path = artifacts.quantized_model_path
+
+    # On a single recording, calibrate on its first part and score the held-out rest
+    report_recording = args.report_recording or args.calibration
+    held_out = os.path.abspath(report_recording) == os.path.abspath(args.calibration)
+    calibration_portion = (0.0, CALIBRATION_FRACTION) if held_out else (0.0, 1.0)
+    report_portion = (CALIBRATION_FRACTION, 1.0) if held_out else (0.0, 1.0)
+
+    classifier = artifacts.load_classifier("onnx", n_channels, GESTURES)
+    windows, _ = recording_windows(classifier, args.calibration, 1, calibration_portion)
+    calibration = windows[np.linspace(0, len(windows) - 1, min(CALIBRATION_WINDOWS, len(windows))).astype(int)]
+    print(f"\nCalibrating INT8 ranges on {len(calibration)} windows of {args.calibration}...")
+    quantize_int8(onnx_path, int8_path, calibration, args.quant_format)
+    print(f"Finished exporting INT8 model to:\n  {int8_path}")
+
+    report = quantization_report(artifacts, onnx_path, int8_path, report_recording, n_channels, report_portion)
+    report_path = os.path.join(REPORT_DIR, f"quantization_{args.tag}.json")
+    save_results(report_path, report)
+    print(f"Report saved to {report_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the CNN to ONNX, optionally with its preprocessing.")
+    parser.add_argument("--tag", default=MODEL_TAG, help="Training run tag (weights, normalization)")
+    parser.add_argument("--from-onnx", action="store_true",
+                        help="Start from the existing exported .onnx instead of rebuilding it (no TensorFlow)")
+    parser.add_argument("--fold-normalization", action="store_true",
+                        help="Include (x - mean) / std from the run's normalization file in the graph")
+    parser.add_argument("--fold-filter", action="store_true",
+                        help="Include an FIR approximation of the highpass + notch as a Conv "
+                             "(input grows to window_size + taps - 1 raw samples); implies --fold-normalization")
+    parser.add_argument("--fir-taps", type=int, default=FIR_TAPS)
+    parser.add_argument("--check", metavar="RECORDING", nargs="?", const=os.path.join(SIGNAL_DIR, CHECK_RECORDING),
+                        help="Compare the folded model with the host-side pipeline on a recording")
+    parser.add_argument("--quantize", action="store_true",
+                        help="Also write a statically quantized INT8 model and compare it with float32 "
+                             "(on the current CNN it comes out larger and slower, so none is shipped)")
+    parser.add_argument("--calibration", default=os.path.join(SIGNAL_DIR, CHECK_RECORDING),
+                        help="Recording whose windows calibrate the INT8 activation ranges")
+    parser.add_argument("--report-recording", help="Recording the fp32/int8 report is scored on (default: the "
+                                                   "part of the calibration recording not used to calibrate)")
+    parser.add_argument("--quant-format", default="qdq", choices=["qdq", "qoperator"])
+    parser.add_argument("--output", help="Output .onnx of the folded model (default: Model Files/...)")
+    args = parser.parse_args()
+
+    weights_path = os.path.join(MODEL_DIR, f"emg_cnn_weights_{args.tag}.npz")
+    onnx_path = os.path.join(MODEL_DIR, f"emg_cnn_model_{args.tag}.onnx")
+    # Normalization sits between the filter and the model, so it cannot stay on the host alone
+    args.fold_normalization |= args.fold_filter
+
+    artifacts = ModelArtifacts(BASE_DIR, args.tag)
+    if args.from_onnx:
+        print(f"Loading exported model from:\n  {onnx_path}")
+        model = onnx.load(onnx_path)
+    else:
+        model = rebuild_and_convert(weights_path, artifacts.window_size)
+        # The plain model is always written; the live predictor loads it
+        onnx.save(model, onnx_path)
+        print("\nFinished exporting ONNX model to:")
+        print(" ", onnx_path)
+    if args.quantize:
+        quantize_and_report(args, model, onnx_path)
+    if not args.fold_normalization:
+        return
+
+    norm_params = artifacts.norm_params
+    mean, std = norm_params['mean'], norm_params['std']
+    sampling_rate = artifacts.sampling_rate or DEFAULT_SAMPLING_RATE
+    fir = fir_from_filter(sampling_rate, args.fir_taps) if args.fold_filter else None
+    pipeline = fold_preprocessing(onnx.load_from_string(model.SerializeToString()), sampling_rate, mean, std, fir)
+
+    output = args.output or os.path.join(MODEL_DIR, f"emg_cnn_model_{args.tag}_pipeline.onnx")
+    onnx.save(pipeline, output)
+    folded = ["normalization"] + ([f"{len(fir)}-tap filter"] if fir is not None else [])
+    dims = [d.dim_param or d.dim_value for d in pipeline.graph.input[0].type.tensor_type.shape.dim]
+    print(f"\nFinished exporting model with {' + '.join(folded)} folded in to:")
+    print(f"  {output}")
+    print(f"  input '{pipeline.graph.input[0].name}': {dims} {'raw' if fir is not None else 'filtered'} samples")
+
+    if args.check:
+        check_pipeline(model, pipeline, args.check, mean, std, len(fir) if fir is not None else 0, sampling_rate)
 
-onnx_model, _ = tf2onnx.convert.from_keras(
-    model,
-    input_signature=input_signature,
-    opset=11  # safe choice for Unity/Barracuda
-)
 
-onnx.save(onnx_model, onnx_path)
-print("\nFinished exporting ONNX model to:")
-print(" ", onnx_path)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
@@ -7,6 +6,10 @@ import keras
 from keras import layers
 import joblib
 import os
+from emg_core.windowing import windows_from_session
+from emg_core.recording import load_recording, EMGSession
+from emg_core.evaluation import filtered_signal
+from emg_core.augmentation import AugmentedWindowDataset
 
 # Define directory structure (same as above)
 BASE_DIR = "EMG Files"
@@ -15,6 +18,7 @@ MODEL_DIR = os.path.join(BASE_DIR, "Model Files")
 ENCODER_DIR = os.path.join(BASE_DIR, "Encoder Files")
 NORM_DIR = os.path.join(BASE_DIR, "Normalization Files")
 TEMPLATE_DIR = os.path.join(BASE_DIR, "Templates")
+DEFAULT_SAMPLING_RATE = 200   # Ganglion; used when the recording does not store its rate
 
 
 # Create output directories
@@ -23,28 +27,23 @@ os.makedirs(ENCODER_DIR, exist_ok=True)
 os.makedirs(NORM_DIR, exist_ok=True)
 os.makedirs(TEMPLATE_DIR, exist_ok=True)
 
-# Load data from signal directory
-df = pd.read_csv(os.path.join(SIGNAL_DIR, "emg_signals_4(new_electrode_placement).csv"))
+# Load data from signal directory (uses the converted binary session when present)
+recording = load_recording(os.path.join(SIGNAL_DIR, "emg_signals_4(new_electrode_placement).csv"))
+sampling_rate = recording.sampling_rate or DEFAULT_SAMPLING_RATE
+if not recording.filtered:
+    # Train on what the live predictor sees: the causal highpass + notch of StreamingFilter
+    recording = EMGSession(filtered_signal(recording, sampling_rate), recording.trials, recording.channels,
+                           sampling_rate, filtered=True)
 window_size = 100  # ~500 ms at 200 Hz sampling rate
 overlap = int(window_size * 0.25)  # 25% overlap
 
-# Extract raw windows (no feature extraction needed for CNN)
-X_windows = []
-y_labels = []
+# Raw windows (no feature extraction needed for CNN), kept as offsets into the recording.
+# Windows never straddle two trials and are only copied out when the model needs them.
+windows = windows_from_session(recording, window_size, overlap)
+y_labels = windows.labels
 
-
-for gesture in sorted(df['label'].unique()):
-    subset = df[df['label'] == gesture].drop(['label', 'trial', 'timestamp'], axis=1, errors='ignore').values
-    for i in range(0, len(subset) - window_size, overlap):
-        window = subset[i:i+window_size, :]  # Shape: (samples, channels)
-        X_windows.append(window)
-        y_labels.append(gesture)
-
-X_windows = np.array(X_windows)
-y_labels = np.array(y_labels)
-
-print(f"Total windows: {len(X_windows)}")
-print(f"Window shape: {X_windows[0].shape}")
+print(f"Total windows: {len(windows)}")
+print(f"Window shape: {(window_size, windows.n_channels)}")
 print(f"Label distribution: {np.unique(y_labels, return_counts=True)}")
 
 # Encode labels
@@ -55,28 +54,27 @@ n_classes = len(label_encoder.classes_)
 print(f"\nClasses: {label_encoder.classes_}")
 print(f"Number of classes: {n_classes}")
 
-# Normalize data (per channel)
-X_mean = np.mean(X_windows, axis=(0, 1), keepdims=True)
-X_std = np.std(X_windows, axis=(0, 1), keepdims=True)
-X_normalized = (X_windows - X_mean) / (X_std + 1e-8)
+# Normalize data (per channel), same statistics as over the stacked windows
+X_mean, X_std = windows.mean_std()
+normalized_windows = windows.normalized(X_mean, X_std)
 
 #========================================================================================================
 propulsion_mask = (y_labels == "propulsion")   # adjust label string if needed
 rest_mask       = (y_labels == "rest")
 
-propulsion_data = X_normalized[propulsion_mask]   # shape: (N_propulsion, window_size, channels)
-rest_data       = X_normalized[rest_mask]         # shape: (N_rest, window_size, channels)
-
-propulsion_template = propulsion_data.mean(axis=0)   # shape: (window_size, channels)
-rest_template       = rest_data.mean(axis=0)
+propulsion_template = normalized_windows.mean_window(propulsion_mask)   # shape: (window_size, channels)
+rest_template       = normalized_windows.mean_window(rest_mask)
 #==========================================================================================================
 
 # Split data with larger test set for better evaluation
-X_train, X_test, y_train, y_test = train_test_split(
-    X_normalized, y_encoded, test_size=0.25, random_state=42, stratify=y_encoded
+train_idx, test_idx, y_train, y_test = train_test_split(
+    np.arange(len(windows)), y_encoded, test_size=0.25, random_state=42, stratify=y_encoded
 )
+# Training windows stay lazy (drawn per batch); the test set is materialized once
+train_windows = normalized_windows.subset(train_idx)
+X_test = normalized_windows.take(test_idx)
 
-print(f"\nTraining samples: {len(X_train)}")
+print(f"\nTraining samples: {len(train_windows)}")
 print(f"Test samples: {len(X_test)}")
 
 # Convert labels to categorical
@@ -113,7 +111,7 @@ def build_cnn_model(input_shape, n_classes):
     return model
 
 # Create model
-input_shape = (window_size, X_train.shape[2])  # (samples, channels)
+input_shape = (window_size, windows.n_channels)  # (samples, channels)
 model = build_cnn_model(input_shape, n_classes)
 
 print("\nModel Architecture:")
@@ -135,25 +133,27 @@ reduce_lr = keras.callbacks.ReduceLROnPlateau(
     verbose=1
 )
 
-# Train model with data augmentation via random noise
+# Train model with data augmentation via random noise, amplitude scaling and time shifts
 print("\nStarting training with augmentation...")
 
-# Create augmented training data by adding small random noise
-def augment_data(X, y, noise_factor=0.05):
-    """Add Gaussian noise to training data for augmentation"""
-    X_aug = X + np.random.normal(0, noise_factor, X.shape)
-    return np.vstack([X, X_aug]), np.hstack([y, y])
-
-X_train_aug, y_train_aug = augment_data(X_train, y_train)
-y_train_aug_cat = keras.utils.to_categorical(y_train_aug, n_classes)
+# Fresh augmentation for every batch, prepared on worker threads while the model trains
+train_data = AugmentedWindowDataset(
+    train_windows, y_train_cat,
+    batch_size=32,
+    noise_factor=0.05,
+    scale_range=(0.9, 1.1),
+    max_shift=overlap // 2,
+    seed=42,
+    workers=2,
+    max_queue_size=10
+)
 
-print(f"Training samples after augmentation: {len(X_train_aug)}")
+print(f"Batches per epoch: {len(train_data)}")
 
 history = model.fit(
-    X_train_aug, y_train_aug_cat,
+    train_data,
     validation_data=(X_test, y_test_cat),
     epochs=150,
-    batch_size=32,
     callbacks=[early_stopping, reduce_lr],
     verbose=1
 )
@@ -170,7 +170,8 @@ joblib.dump({
     'mean': X_mean, 
     'std': X_std,
     'window_size': window_size,
-    'overlap': overlap
+    'overlap': overlap,
+    'sampling_rate': sampling_rate
 }, os.path.join(NORM_DIR, "emg_normalization_4(new_electrode_placement).pkl"))
 
 np.save(os.path.join(TEMPLATE_DIR, "propulsion_template(TEMPLATES_TEST).npy"), propulsion_template)
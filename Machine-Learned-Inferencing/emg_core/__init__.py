@@ -0,0 +1,27 @@
+"""
+Shared EMG pipeline used by the propulsion and rock-paper-scissors games.
+
+    acquisition    BrainFlow board setup and incremental reads
+    boards         --board selection: Ganglion, synthetic, BrainFlow playback, replay
+    replay         Recorded sessions played back as a board
+    ring_buffer    Fixed-size sample history
+    preprocessing  Highpass/notch filters and frequency analysis
+    spectral       Band slices and a running PSD estimated off the hot thread
+    windowing      Training windows as offsets into a recording
+    augmentation   On-the-fly training augmentation (Keras)
+    recording      Binary session format; recorder streams sessions to disk
+    backends       Keras / ONNX Runtime / NumPy inference and gesture decoding
+    numpy_cnn      NumPy forward pass and incremental inference
+    inference_service  One model micro-batching the windows of many predictors
+    artifacts      Lazily loaded model, encoder, normalization and template files
+    evaluation     Offline scoring of recorded sessions
+    benchmark      Stage timings, JSON results and baseline comparison
+    startup        Startup timing
+    metrics        Hot-path stage histograms, counters and JSON endpoint
+    transport      TCP servers for game clients
+    live_plot      Live plot in a separate process
+
+Submodules are not imported here: each entry point imports only what it
+uses, so e.g. the predictor never loads TensorFlow unless it picks the
+Keras backend.
+"""
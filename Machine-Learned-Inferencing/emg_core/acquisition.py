@@ -0,0 +1,115 @@
+import logging
+import numpy as np
+from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds
+
+
+def create_board(serial_port="COM4", board_id=BoardIds.GANGLION_NATIVE_BOARD, timeout=15,
+                 log_level=logging.INFO):
+    """
+    Create a BoardShim and prepare its session (the stream is not started).
+    Args:
+        serial_port: Port of the board's dongle
+        board_id: BrainFlow board id
+        timeout: Seconds to wait for the board to connect
+        log_level: Level for Python logging
+    """
+    BoardShim.enable_dev_board_logger()
+    logging.basicConfig(level=log_level)
+
+    params = BrainFlowInputParams()
+    params.serial_port = serial_port
+    params.timeout = timeout
+    params.master_board = board_id
+
+    board = BoardShim(params.master_board, params)
+    board.prepare_session()
+    return board
+
+
+# How each board numbers its packets: (first id, ids per cycle, samples per id).
+# The Ganglion counts 1-100 with 18-bit compression and 101-200 with 19-bit,
+# two samples per packet; id 0 marks an uncompressed packet outside the count.
+PACKAGE_COUNTERS = {
+    int(BoardIds.GANGLION_BOARD): (1, 100, 2),
+    int(BoardIds.GANGLION_NATIVE_BOARD): (1, 100, 2),
+}
+DEFAULT_PACKAGE_COUNTER = (0, 256, 1)
+
+
+def package_counter(board_id):
+    """(first id, ids per cycle, samples per id) of the board's package-number channel."""
+    return PACKAGE_COUNTERS.get(int(board_id), DEFAULT_PACKAGE_COUNTER)
+
+
+def active_emg_channels(board, active_channels):
+    """
+    Board rows of the selected EMG channels.
+    Args:
+        board: BoardShim
+        active_channels: Positions in the board's EMG channel list, e.g. [0]
+    """
+    emg_channels = BoardShim.get_emg_channels(board.get_board_id())
+    return [emg_channels[i] for i in active_channels]
+
+
+class BoardReader:
+    """
+    Pulls only newly arrived samples from a streaming BoardShim.
+
+    get_board_data(count) removes what it returns from BrainFlow's internal
+    buffer, so every sample is handed downstream exactly once. The board's
+    package-number channel is tracked to report packets lost in transit.
+    """
+
+    def __init__(self, board, channels):
+        """
+        Args:
+            board: BoardShim with an active stream
+            channels: Board rows to return (e.g. the active EMG channel indices)
+        """
+        self.board = board
+        self.channels = list(channels)
+        self.package_channel = BoardShim.get_package_num_channel(board.get_board_id())
+        self.first_package, self.package_cycle, _ = package_counter(board.get_board_id())
+        self.last_package = None  # position in the cycle, None after an uncounted id
+        self.samples_read = 0
+        self.dropped_packets = 0
+
+    def read(self, max_samples=None):
+        """
+        Consume the samples that arrived since the previous call.
+        Args:
+            max_samples: Optional upper bound on the number of samples taken
+        Returns:
+            Array of shape (len(channels), n_new_samples)
+        """
+        count = self.board.get_board_data_count()
+        if max_samples is not None:
+            count = min(count, max_samples)
+        if count <= 0:
+            return np.empty((len(self.channels), 0))
+
+        data = self.board.get_board_data(count)
+        self._track_packages(data[self.package_channel])
+        self.samples_read += data.shape[1]
+        return data[self.channels]
+
+    def _track_packages(self, package_nums):
+        """
+        Count gaps in the package counter. Repeated ids are not drops, a
+        rollover to the start of the cycle (e.g. Ganglion 100 -> 1) is
+        continuous, and ids below the cycle (the Ganglion's raw id 0)
+        restart the count.
+        """
+        if package_nums.size == 0:
+            return
+        package_nums = package_nums.astype(np.int64)
+        counted = package_nums >= self.first_package
+        positions = (package_nums - self.first_package) % self.package_cycle
+        if self.last_package is not None:
+            positions = np.concatenate(([self.last_package], positions))
+            counted = np.concatenate(([True], counted))
+        steps = np.diff(positions) % self.package_cycle
+        gaps = (steps > 1) & counted[:-1] & counted[1:]
+        self.dropped_packets += int(np.sum(steps[gaps] - 1))
+        self.last_package = int(positions[-1]) if counted[-1] else None
@@ -0,0 +1,105 @@
+import os
+from functools import cached_property
+import numpy as np
+
+# Files written by a training run, named after its tag, e.g. "3(TEMPLATES_TEST)":
+#   Model Files/emg_cnn_model_<tag>.keras / .onnx, emg_cnn_weights_<tag>.npz
+#   Encoder Files/emg_label_encoder_<tag>.pkl
+#   Normalization Files/emg_normalization_<tag>.pkl
+#   Templates/<gesture>_template(<template_tag>).npy
+MODEL_FILE_PATTERNS = {
+    "keras": "emg_cnn_model_{tag}.keras",
+    "onnx": "emg_cnn_model_{tag}.onnx",
+    "numpy": "emg_cnn_weights_{tag}.npz",
+}
+# Only written on request by Main_RebuildAndExport_onnx.py --quantize and never
+# shipped, so it is not a backend of its own: callers opt in with quantized=True
+QUANTIZED_MODEL_PATTERN = "emg_cnn_model_{tag}_int8.onnx"
+
+
+class ModelArtifacts:
+    """
+    The model, encoder, normalization and template files of one training run.
+
+    Nothing is read until it is first used, so importing or constructing
+    this never pays for joblib/sklearn unpickling or model loading.
+    """
+
+    def __init__(self, base_dir, tag, template_tag=None):
+        """
+        Args:
+            base_dir: The "EMG Files" directory
+            tag: Training run tag used in the file names
+            template_tag: Tag of the template files (default: no tag)
+        """
+        self.base_dir = base_dir
+        self.tag = tag
+        self.template_tag = template_tag
+        self.model_dir = os.path.join(base_dir, "Model Files")
+        self.encoder_dir = os.path.join(base_dir, "Encoder Files")
+        self.norm_dir = os.path.join(base_dir, "Normalization Files")
+        self.template_dir = os.path.join(base_dir, "Templates")
+
+    @property
+    def model_files(self):
+        """dict mapping backend name -> model filename, as expected by load_backend."""
+        return {name: pattern.format(tag=self.tag) for name, pattern in MODEL_FILE_PATTERNS.items()}
+
+    def model_path(self, backend):
+        return os.path.join(self.model_dir, self.model_files[backend])
+
+    @property
+    def quantized_model_path(self):
+        return os.path.join(self.model_dir, QUANTIZED_MODEL_PATTERN.format(tag=self.tag))
+
+    @cached_property
+    def label_encoder(self):
+        import joblib
+        return joblib.load(os.path.join(self.encoder_dir, f"emg_label_encoder_{self.tag}.pkl"))
+
+    @cached_property
+    def norm_params(self):
+        import joblib
+        return joblib.load(os.path.join(self.norm_dir, f"emg_normalization_{self.tag}.pkl"))
+
+    @property
+    def window_size(self):
+        return self.norm_params['window_size']
+
+    @property
+    def sampling_rate(self):
+        """Rate (Hz) of the recording the run was trained on; None for runs that did not store it."""
+        return self.norm_params.get('sampling_rate')
+
+    def template(self, gesture):
+        """Average training window of a gesture, cut to window_size."""
+        suffix = f"({self.template_tag})" if self.template_tag else ""
+        path = os.path.join(self.template_dir, f"{gesture}_template{suffix}.npy")
+        return np.load(path)[:self.window_size]
+
+    def load_backend(self, name, n_channels, address=None, quantized=False):
+        """
+        Inference backend for this run (see backends.load_backend; address is for "remote").
+        quantized=True runs the INT8 model from --quantize on the "onnx" backend.
+        Raises:
+            ValueError if quantized is set for another backend
+            FileNotFoundError if quantized is set and no INT8 model was written
+        """
+        from .backends import load_backend
+        model_files = self.model_files
+        if quantized:
+            if name != "onnx":
+                raise ValueError(f"The INT8 model runs on the onnx backend, not '{name}'")
+            if not os.path.exists(self.quantized_model_path):
+                raise FileNotFoundError(f"No INT8 model at {self.quantized_model_path}; "
+                                        f"write one with Main_RebuildAndExport_onnx.py --quantize")
+            model_files = dict(model_files, onnx=os.path.basename(self.quantized_model_path))
+        return load_backend(name, self.model_dir, model_files, self.window_size, n_channels,
+                            address, self.tag)
+
+    def load_classifier(self, backend_name, n_channels, gesture_names, address=None, quantized=False):
+        """GestureClassifier wired to this run's backend, statistics and label encoder."""
+        from .backends import GestureClassifier
+        return GestureClassifier(self.load_backend(backend_name, n_channels, address, quantized),
+                                 self.norm_params['mean'], self.norm_params['std'],
+                                 self.window_size, self.label_encoder, gesture_names)
@@ -0,0 +1,68 @@
+import math
+import numpy as np
+import keras
+
+
+class AugmentedWindowDataset(keras.utils.PyDataset):
+    """
+    Training batches drawn lazily from a WindowSet with fresh augmentation.
+
+    Every batch gathers its windows straight from the recording and applies
+    new Gaussian noise, random amplitude scaling and a random time shift
+    (kept inside the window's trial), so memory stays at one copy of the
+    recording and the model sees different noise every epoch. Keras
+    prefetches batches on worker threads (workers / max_queue_size).
+    """
+
+    def __init__(self, windows, targets, batch_size=32, noise_factor=0.05,
+                 scale_range=(0.9, 1.1), max_shift=0, shuffle=True, seed=None, **kwargs):
+        """
+        Args:
+            windows: WindowSet over the (normalized) recording
+            targets: Array of targets, one row per window (e.g. one-hot labels)
+            batch_size: Windows per batch
+            noise_factor: Std of the additive Gaussian noise
+            scale_range: (low, high) range of the random amplitude factor
+            max_shift: Max samples a window start may move in either direction
+            shuffle: Reshuffle the windows after every epoch
+            seed: Seed for reproducible batches
+            **kwargs: workers, use_multiprocessing, max_queue_size for keras.utils.PyDataset
+        """
+        super().__init__(**kwargs)
+        self.windows = windows
+        self.targets = np.asarray(targets)
+        self.batch_size = batch_size
+        self.noise_factor = noise_factor
+        self.scale_range = scale_range
+        self.max_shift = max_shift
+        self.shuffle = shuffle
+        self.seed = np.random.SeedSequence(seed).entropy
+        self.epoch = 0
+        self._order = np.arange(len(windows))
+        self._offsets = np.arange(windows.window_size)
+        self.on_epoch_end()
+
+    def __len__(self):
+        return math.ceil(len(self.windows) / self.batch_size)
+
+    def __getitem__(self, idx):
+        # One generator per (epoch, batch): reproducible and safe across worker threads
+        rng = np.random.default_rng([self.seed, self.epoch, idx])
+        batch_ids = self._order[idx * self.batch_size:(idx + 1) * self.batch_size]
+        n = len(batch_ids)
+
+        starts = self.windows.starts[batch_ids]
+        if self.max_shift:
+            limits = self.windows.start_limits[batch_ids]
+            starts = starts + rng.integers(-self.max_shift, self.max_shift + 1, size=n)
+            starts = np.clip(starts, limits[:, 0], limits[:, 1])
+
+        X = self.windows.signal[starts[:, np.newaxis] + self._offsets].astype(np.float32)
+        X *= rng.uniform(*self.scale_range, size=(n, 1, 1)).astype(np.float32)
+        X += rng.normal(0, self.noise_factor, X.shape).astype(np.float32)
+        return X, self.targets[batch_ids]
+
+    def on_epoch_end(self):
+        self.epoch += 1
+        if self.shuffle:
+            np.random.default_rng([self.seed, self.epoch]).shuffle(self._order)
@@ -0,0 +1,190 @@
+import os
+import numpy as np
+
+# Heavy frameworks are imported inside each backend so that picking one
+# backend never pays the import cost of the others.
+
+
+class KerasBackend:
+    """Runs the trained .keras model directly (imports TensorFlow)."""
+
+    def __init__(self, model_path):
+        import tensorflow as tf
+        self.model = tf.keras.models.load_model(model_path)
+
+    def predict(self, batch):
+        """
+        Args:
+            batch: array of shape (batch_size, window_size, n_channels)
+        Returns:
+            Class probabilities of shape (batch_size, n_classes)
+        """
+        # Calling the model skips predict()'s per-call tf.data setup
+        return np.asarray(self.model(np.asarray(batch, dtype=np.float32), training=False))
+
+
+class OnnxBackend:
+    """
+    Runs the exported .onnx model with ONNX Runtime.
+
+    Single-window calls go through a preallocated float32 input and output
+    bound to the session once, so the hot path allocates nothing. A caller
+    can write the window straight into input_buffer to skip the copy.
+    """
+
+    def __init__(self, model_path, window_size, n_channels, intra_op_threads=1):
+        """
+        Args:
+            model_path: Path to the .onnx file
+            window_size: Samples per window the model was exported for
+            n_channels: Channels per sample
+            intra_op_threads: Threads ONNX Runtime may use inside one operator
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_name = self.session.get_outputs()[0].name
+
+        n_classes = self.session.get_outputs()[0].shape[-1]
+        self.input_buffer = np.zeros((1, window_size, n_channels), dtype=np.float32)
+        self._output = np.zeros((1, n_classes), dtype=np.float32)
+        self._binding = self.session.io_binding()
+        self._binding.bind_cpu_input(self.input_name, self.input_buffer)
+        self._binding.bind_ortvalue_output(self.output_name, ort.OrtValue.ortvalue_from_numpy(self._output))
+
+    def predict(self, batch):
+        """
+        Args:
+            batch: array of shape (batch_size, window_size, n_channels)
+        Returns:
+            Class probabilities of shape (batch_size, n_classes). For a single
+            window this is a preallocated array, valid until the next call.
+        """
+        batch = np.asarray(batch)
+        if batch.shape == self.input_buffer.shape:
+            if batch is not self.input_buffer:
+                np.copyto(self.input_buffer, batch, casting='same_kind')
+            self.session.run_with_iobinding(self._binding)
+            return self._output
+        return self.session.run([self.output_name],
+                                {self.input_name: batch.astype(np.float32, copy=False)})[0]
+
+
+def load_backend(name, model_dir, model_files, window_size, n_channels, address=None, model_tag=""):
+    """
+    Create the inference backend selected by name.
+    Args:
+        name: "keras", "onnx", "numpy" or "remote" (an InferenceServer,
+              see inference_service)
+        model_dir: Directory holding the model files
+        model_files: dict mapping backend name -> model filename
+        window_size: Samples per window
+        n_channels: Channels per sample
+        address: "remote" only: server address (default: inference_service.default_address())
+        model_tag: "remote" only: training run the caller normalizes for, checked by the server
+    Returns:
+        Object with a predict(batch) -> probabilities method
+    """
+    if name == "remote":
+        from .inference_service import RemoteBackend
+        return RemoteBackend(address, model_tag)
+    if name not in model_files:
+        raise ValueError(f"No model file configured for backend '{name}'")
+    model_path = os.path.join(model_dir, model_files[name])
+
+    if name == "keras":
+        return KerasBackend(model_path)
+    if name == "onnx":
+        return OnnxBackend(model_path, window_size, n_channels)
+    if name == "numpy":
+        from .numpy_cnn import NumpyCNN
+        return NumpyCNN.from_npz(model_path)
+    raise ValueError(f"Unknown inference backend '{name}'")
+
+
+class GestureClassifier:
+    """
+    Normalizes a window, runs a backend and decodes the winning class.
+    Shared by the propulsion and rock-paper-scissors predictors.
+    """
+
+    def __init__(self, backend, mean, std, window_size, label_encoder, gesture_names):
+        """
+        Args:
+            backend: Object with predict(batch) -> probabilities (see load_backend)
+            mean, std: Per-channel training statistics
+            window_size: Samples per window
+            label_encoder: Fitted sklearn LabelEncoder from training
+            gesture_names: dict mapping encoded label -> display name
+        """
+        self.backend = backend
+        self.mean = np.asarray(mean).squeeze()  # Remove extra dimensions
+        self.std = np.asarray(std).squeeze()
+        self.window_size = window_size
+        # (x - mean) / (std + 1e-8) as one fused x * scale + offset in float32
+        inverse_std = 1.0 / (self.std + 1e-8)
+        self.scale = np.asarray(inverse_std, dtype=np.float32)
+        self.offset = np.asarray(-self.mean * inverse_std, dtype=np.float32)
+        self._batch = None
+        self.gesture_names = gesture_names
+        # Class index -> label, decoded once instead of on every prediction
+        self.class_labels = [int(label) for label in label_encoder.classes_]
+
+    def normalize(self, samples, out=None):
+        """
+        (samples - mean) / std with the training statistics, in float32.
+        Args:
+            samples: array of shape (..., n_channels)
+            out: Optional float32 array of the same shape to write into
+        """
+        out = np.multiply(samples, self.scale, out=out, dtype=np.float32)
+        out += self.offset
+        return out
+
+    def prepare(self, window):
+        """
+        Normalize a (window_size, n_channels) window into the model's input batch.
+        With the ONNX backend this writes straight into its bound input. The
+        batch is reused, so it is only valid until the next call.
+        """
+        batch = getattr(self.backend, "input_buffer", None)
+        if batch is None or batch.shape[1:] != window.shape:
+            if self._batch is None or self._batch.shape[1:] != window.shape:
+                self._batch = np.empty((1,) + window.shape, dtype=np.float32)
+            batch = self._batch
+        self.normalize(window, out=batch[0])
+        return batch
+
+    def predict(self, window):
+        """
+        Predict gesture from a window of EMG data.
+        Args:
+            window: numpy array of shape (window_size, n_channels)
+        Returns:
+            Predicted gesture name, confidence and all class probabilities
+            (the backend may reuse that array on the next call)
+        """
+        window = np.asarray(window)
+        if window.ndim != 2:
+            raise ValueError(f"Window must be 2D, got shape {window.shape}")
+
+        # Add batch dimension: (window_size, n_channels) -> (1, window_size, n_channels)
+        return self.decode(self.backend.predict(self.prepare(window))[0])
+
+    def decode(self, predictions):
+        """
+        Turn one row of class probabilities into a gesture name and confidence.
+        """
+        predicted_class = int(np.argmax(predictions))
+        confidence = float(predictions[predicted_class])
+        gesture_label = self.class_labels[predicted_class]
+        gesture_name = self.gesture_names.get(gesture_label, f"Unknown ({gesture_label})")
+        return gesture_name, confidence, predictions
@@ -0,0 +1,117 @@
+import json
+import os
+import platform
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+# Percentiles compared against the baseline: the median and the tail
+COMPARED_PERCENTILES = (50, 95)
+
+
+class StageTimes:
+    """
+    Durations of the pipeline stages over many ticks.
+
+    The hot loop reads time.perf_counter_ns() itself and hands the
+    differences to record(); nothing here runs between stages.
+    """
+
+    def __init__(self):
+        self.durations = {}  # stage -> list of nanoseconds, in stage order of first use
+
+    def record(self, stage, nanoseconds):
+        self.durations.setdefault(stage, []).append(nanoseconds)
+
+    def summary(self):
+        """dict mapping stage -> latency_summary() of its durations."""
+        return {stage: latency_summary(np.asarray(values) / 1e3) for stage, values in self.durations.items()}
+
+
+def latency_summary(microseconds):
+    """Count, mean, max and PERCENTILES of durations given in microseconds."""
+    microseconds = np.asarray(microseconds, dtype=np.float64)
+    if microseconds.size == 0:
+        return {"count": 0}
+    summary = {"count": int(microseconds.size), "mean_us": float(microseconds.mean())}
+    for p, value in zip(PERCENTILES, np.percentile(microseconds, PERCENTILES)):
+        summary[f"p{p}_us"] = float(value)
+    summary["max_us"] = float(microseconds.max())
+    return summary
+
+
+def machine_info():
+    """What the numbers were measured on, stored with every result file."""
+    import onnxruntime
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "onnxruntime": onnxruntime.__version__,
+    }
+
+
+def save_results(path, results):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _runs_by_key(results):
+    return {(run["window_size"], run["backend"]): run for run in results["runs"]}
+
+
+def compare_to_baseline(results, baseline, tolerance=0.25, slack_us=5.0):
+    """
+    Regressions of a benchmark against a stored baseline.
+
+    Runs are matched by (window_size, backend); runs missing on either side
+    are not compared. A stage regresses when one of its COMPARED_PERCENTILES
+    grows by more than tolerance (plus slack_us, so microsecond-scale stages
+    do not trip on timer noise), a run when its predictions/s falls by more
+    than tolerance.
+    Returns:
+        list of human-readable regression messages (empty = no regression)
+    """
+    regressions = []
+    old_runs = _runs_by_key(baseline)
+    for key, run in _runs_by_key(results).items():
+        old = old_runs.get(key)
+        if old is None:
+            continue
+        name = f"W={key[0]} {key[1]}"
+        for stage, summary in run["stages"].items():
+            old_summary = old["stages"].get(stage)
+            if not old_summary or not old_summary.get("count") or not summary.get("count"):
+                continue
+            for p in COMPARED_PERCENTILES:
+                now, before = summary[f"p{p}_us"], old_summary[f"p{p}_us"]
+                if now > before * (1 + tolerance) + slack_us:
+                    regressions.append(f"{name} {stage} p{p}: {before:.1f} -> {now:.1f} us "
+                                       f"(+{(now / before - 1) * 100 if before else float('inf'):.0f}%)")
+        now, before = run["predictions_per_s"], old["predictions_per_s"]
+        if now < before * (1 - tolerance):
+            regressions.append(f"{name} throughput: {before:,.0f} -> {now:,.0f} predictions/s "
+                               f"({(now / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def format_run(run):
+    """Table of one run's stages, as printed by Main_Benchmark.py."""
+    lines = [f"W={run['window_size']} {run['backend']} ({run['model']}): "
+             f"{run['predictions_per_s']:,.0f} predictions/s, "
+             f"{run['realtime_factor']:,.0f}x real time"]
+    lines.append(f"  {'stage':<16s}" + "".join(f"{f'p{p} us':>10s}" for p in PERCENTILES) + f"{'max us':>10s}")
+    for stage, summary in run["stages"].items():
+        if not summary.get("count"):
+            lines.append(f"  {stage:<16s}{'no samples':>10s}")
+            continue
+        lines.append(f"  {stage:<16s}" + "".join(f"{summary[f'p{p}_us']:10.1f}" for p in PERCENTILES)
+                     + f"{summary['max_us']:10.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,69 @@
+import logging
+
+# brainflow is imported inside open_board() so that parsing --board costs nothing at startup
+
+# Board sources selectable from the command line:
+#   ganglion            the OpenBCI Ganglion on serial_port
+#   synthetic           BrainFlow's synthetic board (no hardware)
+#   playback:<file>     BrainFlow's PLAYBACK_FILE_BOARD over a file written by DataFilter.write_file
+#   replay:<recording>  a Signal Files CSV or .emg session played back by replay.ReplayBoard
+BOARD_SOURCES = "ganglion, synthetic, playback:<brainflow file>, replay:<csv or .emg session>"
+
+
+def open_board(source="ganglion", speed=1.0, loop=False, serial_port="COM4", log_level=logging.INFO):
+    """
+    Prepare the board session for a source (the stream is not started).
+    Args:
+        source: One of BOARD_SOURCES
+        speed: Replay speed relative to real time, None = as fast as it is read
+            (replay only; BrainFlow playback always runs in real time)
+        loop: Restart playback/replay at the end of the file
+        serial_port: Port of the Ganglion's dongle
+        log_level: Level for Python logging
+    """
+    from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds
+    from .acquisition import create_board
+
+    kind, _, path = source.partition(":")
+    if kind == "ganglion":
+        return create_board(serial_port, BoardIds.GANGLION_NATIVE_BOARD, log_level=log_level)
+    if kind == "synthetic":
+        return create_board("", BoardIds.SYNTHETIC_BOARD, log_level=log_level)
+    if kind == "playback":
+        BoardShim.enable_dev_board_logger()
+        logging.basicConfig(level=log_level)
+        params = BrainFlowInputParams()
+        params.file = path
+        params.master_board = BoardIds.GANGLION_NATIVE_BOARD
+        board = BoardShim(BoardIds.PLAYBACK_FILE_BOARD, params)
+        board.prepare_session()
+        if speed != 1.0:
+            logging.warning("BrainFlow playback only runs in real time; use replay:<file> to change speed")
+        if loop:
+            board.config_board("loopback_true")
+        return board
+    if kind == "replay":
+        logging.basicConfig(level=log_level)
+        from .recording import load_recording
+        from .replay import ReplayBoard
+        session = load_recording(path)
+        if session.filtered:
+            logging.warning(f"{path} is already filtered; the pipeline will filter it again")
+        board = ReplayBoard(session, speed=speed, loop=loop)
+        board.prepare_session()
+        return board
+    raise ValueError(f"Unknown board source '{source}', expected one of: {BOARD_SOURCES}")
+
+
+def add_board_arguments(parser, default_speed=1.0):
+    """Add --board, --speed and --loop to an argparse parser (see open_board_from_args)."""
+    parser.add_argument("--board", default="ganglion", help=f"Board source: {BOARD_SOURCES}")
+    parser.add_argument("--speed", default=str(default_speed),
+                        help="Replay speed: 1 = real time, 4 = 4x faster, 'max' = as fast as it is read")
+    parser.add_argument("--loop", action="store_true", help="Restart playback/replay at the end")
+    parser.add_argument("--serial-port", default="COM4", help="Serial port of the Ganglion dongle")
+
+
+def open_board_from_args(args, log_level=logging.INFO):
+    speed = None if args.speed == "max" else float(args.speed)
+    return open_board(args.board, speed, args.loop, args.serial_port, log_level)
@@ -0,0 +1,98 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+NO_LABEL = -1  # samples recorded between trials
+FILTER_CHUNK = 1 << 20  # samples filtered per call, keeps memory flat on long recordings
+
+
+def filtered_signal(session, sampling_rate):
+    """A recording as the predictor sees it: causally filtered unless it already was."""
+    signal = np.asarray(session.signal, dtype=np.float32)
+    if session.filtered:
+        return signal
+    from .preprocessing import StreamingFilter
+    stream_filter = StreamingFilter(sampling_rate, signal.shape[1])
+    return np.concatenate([stream_filter.process(signal[start:start + FILTER_CHUNK])
+                           for start in range(0, len(signal), FILTER_CHUNK)])
+
+
+def window_ends(n_samples, window_size, stride):
+    """
+    Sample index just past the end of every window, as the live predictor
+    sees them: one window per tick, each ending at the newest sample.
+    """
+    return np.arange(window_size, n_samples + 1, stride)
+
+
+def stream_windows(signal, window_size, stride):
+    """
+    All evaluation windows as one strided (n_windows, window_size, n_channels) view.
+    Args:
+        signal: array of shape (n_samples, n_channels)
+        window_size: Samples per window
+        stride: Samples between consecutive windows (samples per live tick)
+    """
+    return sliding_window_view(signal, window_size, axis=0)[::stride].transpose(0, 2, 1)
+
+
+def predict_batches(backend, windows, batch_size=4096):
+    """
+    Class probabilities for every window, batch_size windows per backend call.
+    Args:
+        backend: Object with predict(batch) -> probabilities
+        windows: array or view of shape (n_windows, window_size, n_channels)
+    Returns:
+        array of shape (n_windows, n_classes)
+    """
+    outputs = []
+    for start in range(0, len(windows), batch_size):
+        batch = np.ascontiguousarray(windows[start:start + batch_size], dtype=np.float32)
+        outputs.append(np.asarray(backend.predict(batch)))
+    return np.concatenate(outputs)
+
+
+def sample_labels(session):
+    """Label of every sample of a recording.EMGSession (NO_LABEL outside trials)."""
+    labels = np.full(len(session), NO_LABEL, dtype=np.int64)
+    for start, stop, label in session.segments():
+        labels[start:stop] = label
+    return labels
+
+
+def confusion_matrix(true_labels, predicted_labels, labels):
+    """
+    Counts with one row per true label and one column per predicted label.
+    Windows whose true label is not in labels (e.g. NO_LABEL) are skipped.
+    """
+    labels = np.asarray(labels)
+    true_labels = np.asarray(true_labels)
+    predicted_labels = np.asarray(predicted_labels)
+    valid = np.isin(true_labels, labels) & np.isin(predicted_labels, labels)
+
+    sorter = np.argsort(labels)
+    rows = sorter[np.searchsorted(labels, true_labels[valid], sorter=sorter)]
+    cols = sorter[np.searchsorted(labels, predicted_labels[valid], sorter=sorter)]
+    matrix = np.zeros((len(labels), len(labels)), dtype=np.int64)
+    np.add.at(matrix, (rows, cols), 1)
+    return matrix
+
+
+def onset_latencies(session, ends, predicted_labels):
+    """
+    Time from each trial's start to the first window ending inside the trial
+    that predicts the trial's gesture.
+    Args:
+        session: recording.EMGSession
+        ends: Window end sample of every prediction (see window_ends)
+        predicted_labels: Predicted label of every window
+    Returns:
+        list of (trial, label, latency_samples), latency None if never detected
+    """
+    results = []
+    for trial in session.trials:
+        start, stop, label = int(trial['start']), int(trial['stop']), int(trial['label'])
+        first, last = np.searchsorted(ends, [start + 1, stop + 1])
+        hits = np.flatnonzero(predicted_labels[first:last] == label)
+        latency = int(ends[first + hits[0]] - start) if hits.size else None
+        results.append((int(trial['trial']), label, latency))
+    return results
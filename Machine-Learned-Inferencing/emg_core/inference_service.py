@@ -0,0 +1,262 @@
+# One model served to many acquisition processes. Each player's predictor
+# sends its normalized windows over a local socket; the server gathers the
+# windows that arrive within a small latency budget into one batch, runs a
+# single forward pass and routes each row of probabilities back. While a
+# batch is running new windows keep queueing, so under load batches grow on
+# their own and the per-call overhead is paid once per batch, not per player.
+#
+# Unix domain socket by default, TCP on localhost where there is none (Windows).
+
+import asyncio
+import logging
+import os
+import socket
+import struct
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# On connect the client sends a hello: uint16 length + UTF-8 training-run tag it
+# normalizes with (empty = any); the server answers a status byte + its own tag
+HELLO_HEADER = struct.Struct("<H")
+HELLO_RESPONSE = struct.Struct("<BH")
+# Request = header + float32 windows, C order (n_windows, window_size, n_channels)
+# Header = uint32 request id, uint16 window count, uint16 window size, uint16 channel count
+REQUEST_HEADER = struct.Struct("<IHHH")
+# Response = header + float32 probabilities (n_windows, n_classes)
+# Header = uint32 request id, uint8 status, uint16 window count, uint16 class count
+RESPONSE_HEADER = struct.Struct("<IBHH")
+STATUS_OK = 0
+STATUS_BAD_SHAPE = 1   # no windows, or not the model's window shape
+STATUS_FAILED = 2      # the forward pass of the batch raised
+STATUS_WRONG_MODEL = 3  # hello named another training run
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "emg_inference.sock")
+DEFAULT_PORT = 50009
+
+
+def default_address():
+    """Unix socket path where supported, else ('127.0.0.1', DEFAULT_PORT)."""
+    return DEFAULT_SOCKET if hasattr(socket, "AF_UNIX") else ('127.0.0.1', DEFAULT_PORT)
+
+
+class InferenceServer:
+    """
+    Micro-batching inference over a local socket.
+
+    The first window of a batch starts a batch_budget timer; the batch runs
+    when the timer fires or max_batch windows are waiting, whichever comes
+    first, or at once when every connected client is waiting on it (each
+    RemoteBackend has one request in flight, so no one else can join).
+    Forward passes run one at a time on a worker thread, and a batch that
+    comes due while one is running goes as soon as it finishes.
+    """
+
+    def __init__(self, backend, window_size, n_channels, address=None, batch_budget=0.002, max_batch=64,
+                 model_tag=""):
+        """
+        Args:
+            backend: Object with predict(batch) -> probabilities (see backends.load_backend)
+            window_size, n_channels: Window shape the model takes
+            model_tag: Training run of the model; clients normalizing for another run are refused
+            address: Unix socket path or (host, port) (default: default_address())
+            batch_budget: Seconds the first window of a batch may wait for others
+            max_batch: Windows that make a batch run immediately
+        """
+        self.backend = backend
+        self.window_size = window_size
+        self.n_channels = n_channels
+        self.address = default_address() if address is None else address
+        self.batch_budget = batch_budget
+        self.max_batch = max_batch
+        self.model_tag = model_tag
+        self.batches = 0
+        self.windows = 0
+        self.n_clients = 0
+        self._pending = []          # (request id, windows, writer)
+        self._pending_windows = 0
+        self._timer = None
+        self._running = False       # a forward pass is in flight
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        self._loop = None
+        self._server = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        if isinstance(self.address, str):
+            if os.path.exists(self.address):
+                os.unlink(self.address)  # left behind by a server that did not shut down cleanly
+            self._server = await asyncio.start_unix_server(self._handle_client, self.address)
+        else:
+            host, port = self.address
+            self._server = await asyncio.start_server(self._handle_client, host, port)
+            self.address = (host, self._server.sockets[0].getsockname()[1])
+        logging.info(f"InferenceServer listening on {self.address}")
+
+    async def serve_forever(self):
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            self._executor.shutdown(wait=False)
+            if isinstance(self.address, str) and os.path.exists(self.address):
+                os.unlink(self.address)
+
+    @property
+    def mean_batch_size(self):
+        return self.windows / self.batches if self.batches else 0.0
+
+    async def _handle_client(self, reader, writer):
+        sock = writer.get_extra_info('socket')
+        if sock is not None and sock.family != getattr(socket, "AF_UNIX", None):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            accepted = await self._handshake(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            accepted = False
+        if not accepted:
+            writer.close()
+            return
+
+        self.n_clients += 1
+        try:
+            while True:
+                request_id, n_windows, window_size, n_channels = REQUEST_HEADER.unpack(
+                    await reader.readexactly(REQUEST_HEADER.size))
+                payload = await reader.readexactly(n_windows * window_size * n_channels * 4)
+                if n_windows == 0 or (window_size, n_channels) != (self.window_size, self.n_channels):
+                    writer.write(RESPONSE_HEADER.pack(request_id, STATUS_BAD_SHAPE, n_windows, 0))
+                    continue
+                windows = np.frombuffer(payload, dtype=np.float32).reshape(n_windows, window_size, n_channels)
+                self._enqueue(request_id, windows, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.n_clients -= 1
+            writer.close()
+
+    async def _handshake(self, reader, writer):
+        """Read the client's hello and answer it; True if it normalizes for the served run."""
+        length, = HELLO_HEADER.unpack(await reader.readexactly(HELLO_HEADER.size))
+        client_tag = (await reader.readexactly(length)).decode()
+        accepted = client_tag in ("", self.model_tag)
+        server_tag = self.model_tag.encode()
+        writer.write(HELLO_RESPONSE.pack(STATUS_OK if accepted else STATUS_WRONG_MODEL, len(server_tag))
+                     + server_tag)
+        if not accepted:
+            logging.warning(f"Refused a client normalizing for {client_tag!r} (serving {self.model_tag!r})")
+        return accepted
+
+    def _enqueue(self, request_id, windows, writer):
+        self._pending.append((request_id, windows, writer))
+        self._pending_windows += len(windows)
+        if self._pending_windows >= self.max_batch or len(self._pending) >= self.n_clients:
+            self._flush()
+        elif self._timer is None:
+            self._timer = self._loop.call_later(self.batch_budget, self._flush)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._running or not self._pending:
+            return  # runs when the forward pass in flight completes
+        requests, self._pending, self._pending_windows = self._pending, [], 0
+        batch = requests[0][1] if len(requests) == 1 else np.concatenate([windows for _, windows, _ in requests])
+        self._running = True
+        future = self._loop.run_in_executor(self._executor, self.backend.predict, batch)
+        future.add_done_callback(lambda f: self._route(f, requests))
+
+    def _route(self, future, requests):
+        self._running = False
+        try:
+            probabilities = np.asarray(future.result(), dtype=np.float32)
+        except Exception:
+            # Only this batch failed: its clients get an error, every connection stays up
+            logging.exception("Batch inference failed")
+            for request_id, windows, writer in requests:
+                if not writer.is_closing():
+                    writer.write(RESPONSE_HEADER.pack(request_id, STATUS_FAILED, len(windows), 0))
+        else:
+            self.batches += 1
+            self.windows += len(probabilities)
+            start = 0
+            for request_id, windows, writer in requests:
+                rows = probabilities[start:start + len(windows)]
+                start += len(windows)
+                if not writer.is_closing():
+                    writer.write(RESPONSE_HEADER.pack(request_id, STATUS_OK, len(rows), rows.shape[1])
+                                 + rows.tobytes())
+        if self._pending_windows >= self.max_batch or (self._pending and self._timer is None):
+            self._flush()  # windows that queued up meanwhile have already waited
+
+
+class RemoteBackend:
+    """
+    Backend whose forward passes run in an InferenceServer.
+
+    A drop-in for the local backends: GestureClassifier still normalizes and
+    decodes in the calling process, only predict() goes over the socket.
+    """
+
+    def __init__(self, address=None, model_tag="", timeout=5.0):
+        """
+        Args:
+            address: Unix socket path or (host, port) of the server (default: default_address())
+            model_tag: Training run whose statistics the caller normalizes with; the
+                       server refuses the connection if it serves another run ("" = any)
+            timeout: Seconds to wait for a response before raising
+        Raises:
+            ValueError if the server serves another training run
+        """
+        self.address = default_address() if address is None else address
+        if isinstance(self.address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(self.address)
+        else:
+            self.sock = socket.create_connection(self.address, timeout=timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._stream = self.sock.makefile('rb')
+        self._request_id = 0
+
+        tag = model_tag.encode()
+        self.sock.sendall(HELLO_HEADER.pack(len(tag)) + tag)
+        status, length = HELLO_RESPONSE.unpack(self._read(HELLO_RESPONSE.size))
+        self.server_tag = self._read(length).decode()
+        if status == STATUS_WRONG_MODEL:
+            self.close()
+            raise ValueError(f"Inference server at {self.address} serves {self.server_tag!r}, "
+                             f"not {model_tag!r}")
+
+    def predict(self, batch):
+        """
+        Args:
+            batch: array of shape (batch_size, window_size, n_channels)
+        Returns:
+            Class probabilities of shape (batch_size, n_classes)
+        """
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        n_windows, window_size, n_channels = batch.shape
+        self._request_id = (self._request_id + 1) & 0xFFFFFFFF
+        self.sock.sendall(REQUEST_HEADER.pack(self._request_id, n_windows, window_size, n_channels) + batch.tobytes())
+
+        header = self._read(RESPONSE_HEADER.size)
+        request_id, status, n_rows, n_classes = RESPONSE_HEADER.unpack(header)
+        if request_id == self._request_id and status == STATUS_BAD_SHAPE:
+            raise ValueError(f"Inference server does not take a batch of shape {batch.shape}")
+        if request_id == self._request_id and status == STATUS_FAILED:
+            raise RuntimeError("Inference server failed on the batch holding this request")
+        if request_id != self._request_id or n_rows != n_windows:
+            raise ConnectionError(f"Unexpected response {request_id} to request {self._request_id}")
+        return np.frombuffer(self._read(n_rows * n_classes * 4), dtype=np.float32).reshape(n_rows, n_classes)
+
+    def _read(self, n):
+        data = self._stream.read(n)
+        if len(data) < n:
+            raise ConnectionError("Inference server closed the connection")
+        return data
+
+    def close(self):
+        self._stream.close()
+        self.sock.close()
@@ -0,0 +1,153 @@
+import multiprocessing as mp
+import os
+import queue
+import time
+import numpy as np
+
+
+class LivePlotter:
+    """
+    Live "EMG window vs expected template" plot drawn in a separate process.
+
+    The predictor only drops frames into a small bounded queue (oldest frame
+    is discarded when full), so it never blocks on matplotlib. The plot
+    process redraws at most max_fps times per second and writes PNG
+    snapshots on request or at most once every snapshot_interval seconds.
+    """
+
+    def __init__(self, save_dir, max_fps=10, snapshot_interval=None, queue_size=2):
+        """
+        Args:
+            save_dir: Directory for PNG snapshots
+            max_fps: Upper bound on redraws per second
+            snapshot_interval: Seconds between automatic snapshots (None = only on request)
+            queue_size: Frames buffered before the oldest one is dropped
+        """
+        self._frames = mp.Queue(maxsize=queue_size)
+        self._process = mp.Process(
+            target=_plot_worker,
+            args=(self._frames, save_dir, max_fps, snapshot_interval),
+            daemon=True,
+        )
+        self._frame_period = 1.0 / max_fps
+        self._last_submit = 0.0
+        self._snapshot_requested = False
+        self.dropped_frames = 0
+
+    def start(self):
+        self._process.start()
+
+    def request_snapshot(self):
+        """Save a PNG of the next submitted frame."""
+        self._snapshot_requested = True
+
+    def submit(self, window_1d, template_1d, gesture_name):
+        """
+        Queue a frame for drawing without blocking.
+        window_1d: 1D numpy array of current filtered EMG for one channel
+        template_1d: 1D numpy array of expected EMG for comparison
+        """
+        now = time.monotonic()
+        if now - self._last_submit < self._frame_period and not self._snapshot_requested:
+            # The plot would not draw it anyway; skip the copy and the queue
+            self.dropped_frames += 1
+            return
+        self._last_submit = now
+
+        frame = (np.array(window_1d), np.array(template_1d), gesture_name, self._snapshot_requested)
+        self._snapshot_requested = False
+        self._put_latest(frame)
+
+    def close(self, timeout=2.0):
+        if not self._process.is_alive():
+            return
+        self._put_latest(None)
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+
+    def _put_latest(self, item):
+        try:
+            self._frames.put_nowait(item)
+            return
+        except queue.Full:
+            pass
+        # Drop the oldest frame to make room for the newest one
+        try:
+            self._frames.get_nowait()
+            self.dropped_frames += 1
+        except queue.Empty:
+            pass
+        try:
+            self._frames.put_nowait(item)
+        except queue.Full:
+            self.dropped_frames += 1
+
+
+def _plot_worker(frames, save_dir, max_fps, snapshot_interval):
+    """Plot process: owns matplotlib and renders only the newest frame."""
+    import matplotlib.pyplot as plt
+
+    os.makedirs(save_dir, exist_ok=True)
+
+    plt.ion()  # interactive mode
+    fig, ax = plt.subplots()
+    input_line, = ax.plot([], [], label="Current EMG window")
+    template_line, = ax.plot([], [], label="Expected template")
+    ax.set_xlabel("Sample")
+    ax.set_ylabel("Amplitude (μV)")
+    ax.set_title("EMG Window vs Expected Template")
+    ax.legend()
+
+    frame_period = 1.0 / max_fps
+    last_snapshot = 0.0
+
+    while True:
+        try:
+            frame = frames.get(timeout=frame_period)
+        except queue.Empty:
+            plt.pause(frame_period)  # keep the window responsive while idle
+            continue
+        # Skip straight to the newest frame if several are waiting
+        try:
+            while frame is not None:
+                frame = frames.get_nowait()
+        except queue.Empty:
+            pass
+        if frame is None:
+            break
+
+        started = time.monotonic()
+        window_1d, template_1d, gesture_name, snapshot = frame
+
+        n = len(window_1d)
+        t = np.arange(n)
+        input_line.set_data(t, window_1d)
+        template_line.set_data(t, template_1d[:n])
+        ax.relim()           # recompute limits
+        ax.autoscale_view()  # rescale axes
+        fig.canvas.draw_idle()
+
+        if snapshot_interval is not None and started - last_snapshot >= snapshot_interval:
+            snapshot = True
+        if snapshot:
+            _save_snapshot(plt, save_dir, window_1d, template_1d, gesture_name)
+            last_snapshot = started
+
+        # Limit the frame rate; pausing also lets the GUI process events
+        plt.pause(max(frame_period - (time.monotonic() - started), 0.001))
+
+    plt.close('all')
+
+
+def _save_snapshot(plt, save_dir, window_1d, template_1d, gesture_name):
+    snapshot_fig = plt.figure()
+    plt.plot(window_1d, label="Current EMG window")
+    plt.plot(template_1d, label="Template")
+    plt.xlabel("Sample Index")
+    plt.ylabel("Normalized Amplitude")
+    plt.title(f"Live EMG vs {gesture_name} Template")
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(os.path.join(save_dir, f"{gesture_name.lower()}_comparison.png"), dpi=300)
+    plt.close(snapshot_fig)
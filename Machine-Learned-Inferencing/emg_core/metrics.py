@@ -0,0 +1,222 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of durations in whole microseconds.
+
+    Values below 2**sub_bucket_bits are counted exactly; above that every
+    power of two is split into 2**(sub_bucket_bits - 1) equal buckets, so
+    any value is kept to within 2**-(sub_bucket_bits - 1) of itself (1.6%
+    for 7 bits) in a fixed number of counters. record() is a few integer
+    operations and one list increment.
+    """
+
+    def __init__(self, max_us=10_000_000, sub_bucket_bits=7):
+        """
+        Args:
+            max_us: Largest value kept apart; longer durations land in the last bucket
+            sub_bucket_bits: Precision, see above
+        """
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.half_count = self.sub_bucket_count >> 1
+        self.counts = [0] * (self._index(max_us) + 1)
+        self.max_us = 0
+
+    def _index(self, value):
+        if value < self.sub_bucket_count:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        return self.sub_bucket_count + (shift - 1) * self.half_count + (value >> shift) - self.half_count
+
+    def _bucket_range(self, index):
+        """[low, high) microseconds of a bucket."""
+        if index < self.sub_bucket_count:
+            return index, index + 1
+        shift, offset = divmod(index - self.sub_bucket_count, self.half_count)
+        shift += 1
+        low = (offset + self.half_count) << shift
+        return low, low + (1 << shift)
+
+    def record(self, microseconds):
+        value = int(microseconds)
+        self.counts[min(self._index(value), len(self.counts) - 1)] += 1
+        if value > self.max_us:
+            self.max_us = value
+
+    def snapshot(self):
+        """Copy of the counts, e.g. to report only what was recorded since."""
+        return np.array(self.counts, dtype=np.int64)
+
+    def percentiles(self, percentiles, counts=None):
+        """
+        Args:
+            percentiles: Percentiles to read, in [0, 100]
+            counts: Counts to read them from (default: everything recorded), e.g.
+                snapshot() minus an earlier snapshot()
+        Returns:
+            list of values in microseconds (bucket midpoints), None when empty
+        """
+        counts = self.snapshot() if counts is None else counts
+        cumulative = np.cumsum(counts)
+        total = cumulative[-1]
+        if total == 0:
+            return [None] * len(percentiles)
+        values = []
+        for p in percentiles:
+            index = int(np.searchsorted(cumulative, max(1, int(np.ceil(p / 100 * total)))))
+            low, high = self._bucket_range(index)
+            values.append((low + high - 1) / 2)
+        return values
+
+
+class PipelineMetrics:
+    """
+    Per-stage timings and counters of the live prediction loop.
+
+        metrics.start_tick()
+        data = reader.read()
+        metrics.lap("read")       # time since the previous lap / start_tick
+        ...
+        metrics.end_tick()        # whole tick, counts an overrun if over budget
+
+    Timestamps come from time.perf_counter_ns() (monotonic); each lap costs
+    about a microsecond. report_line() and snapshot() summarize off the hot
+    path. Use NullMetrics when instrumentation is off.
+    """
+
+    def __init__(self, tick_budget_s):
+        """
+        Args:
+            tick_budget_s: Work time a tick may take before it counts as an overrun
+        """
+        self.tick_budget_ns = int(tick_budget_s * 1e9)
+        self.histograms = {}  # stage -> LatencyHistogram, in order of first use
+        self.counters = {"ticks": 0, "overruns": 0, "underruns": 0}
+        self._tick_start = self._lap_start = 0
+        self._reported = {}   # stage -> counts at the previous report_line()
+        self._reported_ticks = 0
+        self._reported_at = time.perf_counter()
+        self._lock = threading.Lock()  # only between snapshot() and report_line()
+
+    def _histogram(self, stage):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram()
+        return histogram
+
+    def start_tick(self):
+        self._tick_start = self._lap_start = time.perf_counter_ns()
+
+    def lap(self, stage):
+        now = time.perf_counter_ns()
+        self._histogram(stage).record((now - self._lap_start) // 1000)
+        self._lap_start = now
+
+    def end_tick(self):
+        elapsed = time.perf_counter_ns() - self._tick_start
+        self._histogram("tick").record(elapsed // 1000)
+        self.counters["ticks"] += 1
+        if elapsed > self.tick_budget_ns:
+            self.counters["overruns"] += 1
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def set(self, name, value):
+        """Counters kept elsewhere, e.g. BoardReader.dropped_packets."""
+        self.counters[name] = value
+
+    def report_line(self):
+        """
+        One compact line: ticks/s, p50/p99 of every stage since the previous
+        call (in microseconds) and the counters.
+        """
+        with self._lock:
+            now = time.perf_counter()
+            ticks = self.counters["ticks"]
+            rate = (ticks - self._reported_ticks) / max(now - self._reported_at, 1e-9)
+            self._reported_ticks, self._reported_at = ticks, now
+
+            stages = []
+            for stage, histogram in self.histograms.items():
+                counts = histogram.snapshot()
+                previous = self._reported.get(stage)
+                interval = counts if previous is None else counts - previous
+                self._reported[stage] = counts
+                p50, p99 = histogram.percentiles((50, 99), interval)
+                if p50 is not None:
+                    stages.append(f"{stage} {p50:.0f}/{p99:.0f}")
+        counters = " ".join(f"{name} {value}" for name, value in self.counters.items() if name != "ticks")
+        return f"{rate:.1f} ticks/s | p50/p99 us: {', '.join(stages)} | {counters}"
+
+    def snapshot(self):
+        """Everything recorded so far as a JSON-friendly dict."""
+        with self._lock:
+            stages = {}
+            for stage, histogram in list(self.histograms.items()):
+                counts = histogram.snapshot()
+                p50, p90, p99, p999 = histogram.percentiles((50, 90, 99, 99.9), counts)
+                stages[stage] = {"count": int(counts.sum()), "p50_us": p50, "p90_us": p90,
+                                 "p99_us": p99, "p999_us": p999, "max_us": histogram.max_us}
+            return {"stages": stages, "counters": dict(self.counters)}
+
+    def serve(self, port, host='127.0.0.1'):
+        """
+        Serve snapshot() as JSON on http://host:port/metrics from a daemon thread.
+        Returns:
+            The ThreadingHTTPServer (call shutdown() to stop it)
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = json.dumps(metrics.snapshot()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # one line per scrape would drown the predictor's output
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+class NullMetrics:
+    """Same calls as PipelineMetrics, all no-ops: instrumentation switched off."""
+
+    def start_tick(self):
+        pass
+
+    def lap(self, stage):
+        pass
+
+    def end_tick(self):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def set(self, name, value):
+        pass
+
+    def report_line(self):
+        return ""
+
+    def snapshot(self):
+        return {}
+
+    def serve(self, port, host='127.0.0.1'):
+        raise RuntimeError("Metrics are disabled")
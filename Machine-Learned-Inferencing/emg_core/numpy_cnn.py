@@ -0,0 +1,308 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Keras BatchNormalization default epsilon
+BN_EPSILON = 1e-3
+
+
+def conv1d_same(x, kernel, bias):
+    """
+    Conv1D with padding='same' and stride 1, done as one im2col matmul.
+    Args:
+        x: array of shape (batch, length, in_channels)
+        kernel: Keras kernel of shape (kernel_size, in_channels, filters)
+        bias: array of shape (filters,)
+    Returns:
+        Array of shape (batch, length, filters)
+    """
+    k, c_in, c_out = kernel.shape
+    pad_left = (k - 1) // 2
+    pad_right = k - 1 - pad_left
+    padded = np.pad(x, ((0, 0), (pad_left, pad_right), (0, 0)))
+    # (batch, length, in_channels, k) view -> (batch, length, k, in_channels) columns
+    cols = sliding_window_view(padded, k, axis=1).transpose(0, 1, 3, 2)
+    cols = cols.reshape(x.shape[0], x.shape[1], k * c_in)
+    return cols @ kernel.reshape(k * c_in, c_out) + bias
+
+
+class NumpyCNN:
+    """
+    Dependency-light forward pass of the CNN built in Main_Train.build_cnn_model:
+
+        Conv1D(16, k5, relu) -> BN -> MaxPool(2) -> Conv1D(32, k3, relu) -> BN
+        -> GlobalAveragePooling -> Dense(16, relu) -> Dense(n_classes, softmax)
+
+    Dropout is a no-op at inference. Because BatchNormalization follows the
+    ReLU, BN1 is kept as a fused per-channel scale/shift and BN2 is folded
+    exactly into the first Dense layer (GAP is linear).
+    """
+
+    def __init__(self, weights):
+        """
+        Args:
+            weights: list of arrays in model.get_weights() order
+        """
+        if len(weights) != 16:
+            raise ValueError(f"Expected 16 weight arrays, got {len(weights)}")
+        (k1, b1, g1, be1, m1, v1,
+         k2, b2, g2, be2, m2, v2,
+         w3, b3, w4, b4) = [np.asarray(w, dtype=np.float32) for w in weights]
+
+        self.conv1_kernel, self.conv1_bias = k1, b1
+        self.bn1_scale = g1 / np.sqrt(v1 + BN_EPSILON)
+        self.bn1_shift = be1 - m1 * self.bn1_scale
+
+        self.conv2_kernel, self.conv2_bias = k2, b2
+        bn2_scale = g2 / np.sqrt(v2 + BN_EPSILON)
+        bn2_shift = be2 - m2 * bn2_scale
+
+        # mean(relu(c) * s + t) @ W + b == mean(relu(c)) @ (s[:, None] * W) + (t @ W + b)
+        self.dense1_weight = bn2_scale[:, np.newaxis] * w3
+        self.dense1_bias = bn2_shift @ w3 + b3
+        self.dense2_weight, self.dense2_bias = w4, b4
+
+        self.n_channels = k1.shape[1]
+        self.n_classes = b4.shape[0]
+
+    @classmethod
+    def from_npz(cls, weights_path):
+        """Load the arrays written by Main_ExportWeights.py (arr_0, arr_1, ...)."""
+        data = np.load(weights_path)
+        keys_sorted = sorted(data.files, key=lambda k: int(k.split('_')[1]))
+        return cls([data[k] for k in keys_sorted])
+
+    def conv_block1(self, x):
+        """Conv1D + ReLU + BN1 on (batch, length, n_channels) input."""
+        h = conv1d_same(x, self.conv1_kernel, self.conv1_bias)
+        np.maximum(h, 0, out=h)
+        h *= self.bn1_scale
+        h += self.bn1_shift
+        return h
+
+    def head(self, gap):
+        """Dense layers + softmax on the GAP of relu(conv2) (BN2 already folded in)."""
+        z = np.maximum(gap @ self.dense1_weight + self.dense1_bias, 0)
+        logits = z @ self.dense2_weight + self.dense2_bias
+        logits -= logits.max(axis=-1, keepdims=True)
+        np.exp(logits, out=logits)
+        logits /= logits.sum(axis=-1, keepdims=True)
+        return logits
+
+    def predict(self, batch):
+        """
+        Args:
+            batch: array of shape (batch_size, window_size, n_channels)
+        Returns:
+            Class probabilities of shape (batch_size, n_classes)
+        """
+        x = np.asarray(batch, dtype=np.float32)
+        if x.ndim != 3 or x.shape[2] != self.n_channels:
+            raise ValueError(f"Batch must have shape (batch, window, {self.n_channels}), got {x.shape}")
+
+        h = self.conv_block1(x)
+
+        # MaxPooling1D(pool_size=2), 'valid' padding
+        pooled_len = h.shape[1] // 2
+        h = h[:, :2 * pooled_len].reshape(h.shape[0], pooled_len, 2, -1).max(axis=2)
+
+        c = conv1d_same(h, self.conv2_kernel, self.conv2_bias)
+        np.maximum(c, 0, out=c)
+        return self.head(c.mean(axis=1))
+
+
+class IncrementalCNN:
+    """
+    Sliding-window inference that reuses conv activations between hops.
+
+    Away from the window edges every conv output depends only on absolute
+    sample time, so conv-block-1/2 activations are computed once per new
+    sample and cached in history buffers. The GlobalAveragePooling sum is kept
+    as a running total per pooling phase (window start parity); only the few
+    outputs touched by 'same' zero padding at the window edges are recomputed
+    for each prediction. A chunk of new samples is processed with one matmul
+    per layer rather than sample by sample. Results match NumpyCNN.predict on
+    the same window.
+    """
+
+    def __init__(self, cnn, window_size, resync_interval=None):
+        """
+        Args:
+            cnn: NumpyCNN holding the weights
+            window_size: Samples per window (even, at least 10)
+            resync_interval: Samples between exact recomputations of the running sums
+        """
+        if window_size % 2 or window_size < 10:
+            raise ValueError(f"window_size must be even and >= 10, got {window_size}")
+        if cnn.conv1_kernel.shape[0] != 5 or cnn.conv2_kernel.shape[0] != 3:
+            raise ValueError("IncrementalCNN expects the k5/k3 architecture from Main_Train")
+
+        self.cnn = cnn
+        self.window_size = window_size
+        self.pooled_len = window_size // 2
+        self.resync_interval = resync_interval or 50 * window_size
+
+        n_ch = cnn.n_channels
+        f1 = cnn.conv1_kernel.shape[2]
+        f2 = cnn.conv2_kernel.shape[2]
+        # Flattened float64 copies: a conv output is one (k * c_in) @ (k * c_in, f) product
+        self._k1_flat = cnn.conv1_kernel.astype(np.float64).reshape(-1, f1)
+        self._k2_flat = cnn.conv2_kernel.astype(np.float64).reshape(-1, f2)
+        self._b1 = cnn.conv1_bias.astype(np.float64)
+        self._b2 = cnn.conv2_bias.astype(np.float64)
+        self._bn1_scale = cnn.bn1_scale.astype(np.float64)
+        self._bn1_shift = cnn.bn1_shift.astype(np.float64)
+
+        # Linear histories indexed by sample time - _base, compacted when full.
+        # Keeping two windows on compaction leaves every window ending inside a
+        # chunk of up to window_size new samples intact, and every gather a slice
+        capacity = 4 * window_size
+        self._x = np.zeros((capacity, n_ch))
+        self._h = np.zeros((capacity, f1))
+        self._q = np.zeros((capacity, f1))
+        self._r = np.zeros((capacity, f2))
+        self._totals = np.zeros((2, f2))
+        # Conv input columns as fixed strided views: row i holds the k steps from
+        # position i on (compaction copies in place, so the views stay valid)
+        self._x_cols5 = sliding_window_view(self._x, 5, axis=0).transpose(0, 2, 1)
+        self._x_cols4 = sliding_window_view(self._x, 4, axis=0).transpose(0, 2, 1)
+        self._q_cols = sliding_window_view(self._q, 5, axis=0)[:, :, ::2].transpose(0, 2, 1)
+        # Zero-padded inputs of the four edge conv outputs per window (two per window end)
+        self._edge_x = np.zeros((window_size, 4, 5, n_ch))
+        self._edge_q = np.zeros((window_size, 4, 3, f1))
+        self.reset()
+
+    def reset(self):
+        """Drop all cached activations (e.g. after a gap in the stream)."""
+        self._t = -1
+        self._base = -self.window_size  # times before the first sample read as zeros
+        self._totals[:] = 0
+        for history in (self._x, self._h, self._q, self._r):
+            history[:] = 0
+
+    def _compact(self, keep_from):
+        """Move the history from time keep_from on to the front of the buffers."""
+        shift = keep_from - self._base
+        for history in (self._x, self._h, self._q, self._r):
+            history[:-shift] = history[shift:]
+        self._base = keep_from
+
+    def _bn1(self, a):
+        return np.maximum(a + self._b1, 0) * self._bn1_scale + self._bn1_shift
+
+    def _conv2(self, cols):
+        """relu(conv2) for rows of concatenated [q(m-2), q(m), q(m+2)] columns."""
+        return np.maximum(cols @ self._k2_flat + self._b2, 0)
+
+    def _resync(self):
+        """Recompute both running totals exactly from the cached activations."""
+        n = self.window_size
+        t = self._t
+        for newest in (t - 5, t - 6):
+            # Window ending at newest + 5 sums m in [newest - n + 10, newest] step 2
+            ms = np.arange(max(newest - n + 10, 4 + newest % 2), newest + 1, 2)
+            self._totals[newest % 2] = self._r[ms - self._base].sum(axis=0) if ms.size else 0
+
+    def _advance(self, samples):
+        """
+        Push up to window_size samples.
+        Returns:
+            relu(conv2) sums of the windows ending at each new sample that
+            completes one, shape (n_ready, f2)
+        """
+        n = self.window_size
+        t0 = self._t
+        t_end = t0 + len(samples)
+        if t_end - self._base >= len(self._x):
+            self._compact(t0 + 1 - 2 * n)
+        b = self._base
+        self._t = t_end
+        x, h, q, r = self._x, self._h, self._q, self._r
+        x[t0 + 1 - b:t_end + 1 - b] = samples
+
+        # H(u), u = t - 2 for t >= 4: interior conv block 1, needs x[u-2 .. u+2]
+        ua, ub = max(t0 + 1, 4) - 2, t_end - 1
+        if ub > ua:
+            cols = self._x_cols5[ua - 2 - b:ub - 2 - b].reshape(ub - ua, -1)
+            h[ua - b:ub - b] = self._bn1(cols @ self._k1_flat)
+        # Q(v), v = t - 3 for t >= 5: max pool over H(v), H(v+1)
+        va, vb = max(t0 + 1, 5) - 3, t_end - 2
+        if vb > va:
+            np.maximum(h[va - b:vb - b], h[va + 1 - b:vb + 1 - b], out=q[va - b:vb - b])
+        # R(m), m = t - 5 for t >= 9: relu(conv2) over Q(m-2), Q(m), Q(m+2)
+        ma, mb = max(t0 + 1, 9) - 5, t_end - 4
+        if mb <= ma:
+            return np.empty((0, r.shape[1]))
+        r[ma - b:mb - b] = self._conv2(self._q_cols[ma - 2 - b:mb - 2 - b].reshape(mb - ma, -1))
+
+        # Running totals after each step: R(m) enters the sum of its parity and
+        # R(m - n + 8) (same parity, n is even; zero before m = 4) leaves it
+        deltas = r[ma - b:mb - b] - r[ma - n + 8 - b:mb - n + 8 - b]
+        totals = np.empty_like(deltas)
+        for offset in (0, 1):
+            running = np.cumsum(deltas[offset::2], axis=0)
+            if len(running):
+                running += self._totals[(ma + offset) % 2]
+                totals[offset::2] = running
+                self._totals[(ma + offset) % 2] = running[-1]
+        if t_end // self.resync_interval > t0 // self.resync_interval:
+            self._resync()
+
+        # Windows end at m + 5; the first full one ends at n - 1
+        first_ready = max(n - 6 - ma, 0)
+        if first_ready >= mb - ma:
+            return np.empty((0, r.shape[1]))
+        return totals[first_ready:] + self._edge_sums(ma + 5 + first_ready, mb + 5)
+
+    def _edge_sums(self, first_end, stop_end):
+        """relu(conv2) at the four zero-padded window-edge positions of the windows ending in [first_end, stop_end)."""
+        n = self.window_size
+        b = self._base
+        k = stop_end - first_end
+        s = first_end - n + 1  # start of the first window
+        q = self._q
+        first = self._x_cols4[s - b:s + k - b]
+        last = self._x_cols4[first_end - 3 - b:stop_end - 3 - b]
+
+        # Conv1 at window positions 0, 1, n-2, n-1 sees zero padding outside the window
+        ex = self._edge_x[:k]
+        ex[:, 0, 2:] = first[:, :3]
+        ex[:, 1, 1:] = first
+        ex[:, 2, :4] = last
+        ex[:, 3, :3] = last[:, 1:]
+        he = self._bn1(ex.reshape(4 * k, -1) @ self._k1_flat).reshape(k, 4, -1)
+        h_first = np.maximum(he[:, 0], he[:, 1])
+        h_last = np.maximum(he[:, 2], he[:, 3])
+
+        # Conv2 at pooled positions 0, 1, P-2, P-1
+        eq = self._edge_q[:k]
+        eq[:, 0, 1] = h_first
+        eq[:, 0, 2] = q[s + 2 - b:s + 2 + k - b]
+        eq[:, 1, 0] = h_first
+        eq[:, 1, 1] = q[s + 2 - b:s + 2 + k - b]
+        eq[:, 1, 2] = q[s + 4 - b:s + 4 + k - b]
+        eq[:, 2, 0] = q[first_end - 5 - b:stop_end - 5 - b]
+        eq[:, 2, 1] = q[first_end - 3 - b:stop_end - 3 - b]
+        eq[:, 2, 2] = h_last
+        eq[:, 3, 0] = q[first_end - 3 - b:stop_end - 3 - b]
+        eq[:, 3, 1] = h_last
+        return self._conv2(eq.reshape(4 * k, -1)).reshape(k, 4, -1).sum(axis=1)
+
+    def update(self, samples):
+        """
+        Push newly arrived, already normalized samples.
+        Args:
+            samples: array of shape (n_samples, n_channels)
+        Returns:
+            Probabilities of shape (n_ready, n_classes), one row for every
+            new sample that completes a full window (may be empty)
+        """
+        samples = np.asarray(samples, dtype=np.float64)
+        n = self.window_size
+        if len(samples) <= n:
+            sums = self._advance(samples)
+        else:
+            sums = np.concatenate([self._advance(samples[i:i + n]) for i in range(0, len(samples), n)])
+        if not len(sums):
+            return np.empty((0, self.cnn.n_classes), dtype=np.float32)
+        gap = (sums / self.pooled_len).astype(np.float32)
+        return self.cnn.head(gap)
@@ -0,0 +1,100 @@
+from functools import lru_cache
+import numpy as np
+from scipy.signal import iirnotch, butter, tf2sos, sosfilt, sosfilt_zi, welch
+from .spectral import band_summary, spectrum_layout
+
+
+# Designs are cached per parameter set and shared between callers: do not modify them in place
+@lru_cache(maxsize=None)
+def design_highpass_sos(fs, cutoff=20.0, order=4):
+    """
+    Design the Butterworth highpass used throughout the EMG pipeline.
+    Returns second-order sections so the filter can be run in chunks.
+    """
+    nyq = 0.5 * fs
+    return butter(order, cutoff / nyq, btype='high', output='sos')
+
+@lru_cache(maxsize=None)
+def design_notch_sos(fs, notch_freq=60.0, quality_factor=30.0):
+    """
+    Design the powerline notch filter (e.g., 60 Hz) as second-order sections.
+    """
+    b, a = iirnotch(notch_freq, quality_factor, fs)
+    return tf2sos(b, a)
+
+@lru_cache(maxsize=None)
+def design_emg_sos(fs, highpass_cutoff=20.0, highpass_order=4, notch_freq=60.0, quality_factor=30.0):
+    """Highpass followed by notch as one cascade of second-order sections."""
+    return np.vstack([
+        design_highpass_sos(fs, highpass_cutoff, highpass_order),
+        design_notch_sos(fs, notch_freq, quality_factor),
+    ])
+
+
+class StreamingFilter:
+    """
+    Causal highpass + notch filter that keeps its state between calls.
+
+    The coefficients are designed once and the sos state (zi) is carried
+    across chunks, so each sample is filtered exactly once no matter how
+    often a prediction window is evaluated. Coefficients, state and output
+    are float32 by default, the precision the models run at.
+    """
+
+    def __init__(self, fs, n_channels, highpass_cutoff=20.0, highpass_order=4,
+                 notch_freq=60.0, quality_factor=30.0, dtype=np.float32):
+        """
+        Args:
+            fs: Sampling frequency (Hz)
+            n_channels: Number of channels filtered side by side
+            highpass_cutoff: Highpass cutoff frequency (Hz)
+            highpass_order: Butterworth order of the highpass
+            notch_freq: Frequency to remove (Hz)
+            quality_factor: Quality factor for the notch filter
+            dtype: Precision the filter runs at
+        """
+        self.fs = fs
+        self.n_channels = n_channels
+        self.dtype = np.dtype(dtype)
+        # Own copy in the working precision (the cached design is shared)
+        self.sos = design_emg_sos(fs, highpass_cutoff, highpass_order, notch_freq, quality_factor).astype(self.dtype)
+        self.zi = None
+
+    def reset(self):
+        """Forget the filter state; the next chunk re-initializes it."""
+        self.zi = None
+
+    def process(self, chunk):
+        """
+        Filter newly arrived samples.
+        Args:
+            chunk: array of shape (n_samples, n_channels)
+        Returns:
+            Filtered samples with the same shape as chunk
+        """
+        x = np.asarray(chunk, dtype=self.dtype)
+        if x.ndim != 2 or x.shape[1] != self.n_channels:
+            raise ValueError(f"Chunk must have shape (n_samples, {self.n_channels}), got {x.shape}")
+        if x.shape[0] == 0:
+            return x.copy()
+
+        if self.zi is None:
+            # Start in steady state for the first sample to avoid a step transient
+            zi_unit = sosfilt_zi(self.sos).astype(self.dtype)  # (n_sections, 2)
+            self.zi = zi_unit[:, :, np.newaxis] * x[0]
+
+        y, self.zi = sosfilt(self.sos, x, axis=0, zi=self.zi)
+        return y
+
+
+def analyze_signal_frequency(signal, fs):
+    """
+    Analyze the frequency content of a signal using Welch's method.
+    Returns dominant frequency and power spectrum info.
+    """
+    # Use Welch's method to estimate power spectral density
+    nperseg = min(256, len(signal))
+    freqs, psd = welch(signal, fs=fs, nperseg=nperseg)
+    
+    # Dominant frequency (excluding DC) and power per band, with band slices cached per (fs, nperseg)
+    return band_summary(freqs, psd, spectrum_layout(fs, nperseg)[1])
@@ -0,0 +1,83 @@
+import threading
+import time
+from .acquisition import BoardReader
+
+
+class StreamRecorder:
+    """
+    Records a whole session from one continuous board stream.
+
+    A background thread drains the board every chunk_interval seconds,
+    optionally filters the chunk with a StreamingFilter and appends it to a
+    SessionWriter, so memory use does not grow with session length. Trial
+    boundaries are marked as sample indices into the continuous recording.
+    """
+
+    def __init__(self, board, channels, writer, stream_filter=None, chunk_interval=0.1):
+        """
+        Args:
+            board: Prepared BoardShim (the stream is started by start())
+            channels: Board rows to record (active EMG channel indices)
+            writer: recording.SessionWriter receiving the samples
+            stream_filter: Optional preprocessing.StreamingFilter applied per chunk
+            chunk_interval: Seconds between board drains
+        """
+        self.board = board
+        self.reader = BoardReader(board, channels)
+        self.writer = writer
+        self.stream_filter = stream_filter
+        self.chunk_interval = chunk_interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._current_trial = None
+
+    def start(self):
+        self.board.start_stream()
+        self._thread.start()
+
+    def stop(self):
+        """Stop draining, flush what is left in the board buffer and stop the stream."""
+        self._stop.set()
+        self._thread.join()
+        with self._lock:
+            self._drain()
+        self.board.stop_stream()
+
+    @property
+    def n_samples(self):
+        return self.writer.n_samples
+
+    @property
+    def dropped_packets(self):
+        return self.reader.dropped_packets
+
+    def begin_trial(self, trial, label):
+        """Mark the start of a trial at the current position in the stream."""
+        with self._lock:
+            self._drain()
+            self._current_trial = (trial, label, self.writer.n_samples, time.time())
+
+    def end_trial(self):
+        """Mark the end of the current trial. Returns its number of samples."""
+        with self._lock:
+            self._drain()
+            trial, label, start, timestamp = self._current_trial
+            stop = self.writer.n_samples
+            self.writer.add_trial(trial, label, start, stop, timestamp)
+            self._current_trial = None
+        return stop - start
+
+    def _run(self):
+        while not self._stop.wait(self.chunk_interval):
+            with self._lock:
+                self._drain()
+
+    def _drain(self):
+        data = self.reader.read()
+        if data.shape[1] == 0:
+            return
+        samples = data.T  # (n_samples, n_channels)
+        if self.stream_filter is not None:
+            samples = self.stream_filter.process(samples)
+        self.writer.append(samples)
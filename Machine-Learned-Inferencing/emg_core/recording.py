@@ -0,0 +1,217 @@
+import json
+import os
+import numpy as np
+
+# A session is a directory holding:
+#   signal.npy  float32 samples, shape (n_samples, n_channels), memory-mappable
+#   trials.npy  one row per trial: trial, label, start, stop, timestamp
+#   meta.json   channel names, sampling rate, whether the signal is already filtered
+SESSION_SUFFIX = ".emg"
+FORMAT_VERSION = 1
+
+TRIAL_DTYPE = np.dtype([
+    ('trial', np.int32),
+    ('label', np.int32),
+    ('start', np.int64),
+    ('stop', np.int64),
+    ('timestamp', np.float64),
+])
+
+
+class EMGSession:
+    """A recorded session: one contiguous signal plus per-trial metadata."""
+
+    def __init__(self, signal, trials, channels, sampling_rate=None, filtered=True):
+        self.signal = signal
+        self.trials = trials
+        self.channels = list(channels)
+        self.sampling_rate = sampling_rate
+        self.filtered = filtered
+
+    def __len__(self):
+        return len(self.signal)
+
+    def segments(self):
+        """(start, stop, label) of every trial, in recording order."""
+        return [(int(t['start']), int(t['stop']), int(t['label'])) for t in self.trials]
+
+    def to_dataframe(self):
+        """Expand back into the per-row CSV layout [ch1, ..., label, trial, timestamp]."""
+        import pandas as pd
+        df = pd.DataFrame(np.asarray(self.signal), columns=self.channels)
+        for column in ('label', 'trial', 'timestamp'):
+            values = np.full(len(df), -1, dtype=self.trials.dtype[column])
+            for t in self.trials:
+                values[t['start']:t['stop']] = t[column]
+            df[column] = values
+        return df
+
+
+def save_session(path, signal, trials, channels, sampling_rate=None, filtered=True):
+    """
+    Write a session directory.
+    Args:
+        path: Session directory (created if needed)
+        signal: array of shape (n_samples, n_channels); stored as float32
+        trials: structured array with TRIAL_DTYPE fields
+        channels: Channel names, e.g. ["ch1"]
+        sampling_rate: Sampling frequency (Hz), if known
+        filtered: Whether highpass/notch filtering was already applied
+    """
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "signal.npy"), np.ascontiguousarray(signal, dtype=np.float32))
+    np.save(os.path.join(path, "trials.npy"), np.asarray(trials, dtype=TRIAL_DTYPE))
+    write_meta(path, channels, sampling_rate, filtered)
+
+
+def write_meta(path, channels, sampling_rate=None, filtered=True):
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'channels': list(channels),
+        'sampling_rate': sampling_rate,
+        'filtered': filtered,
+    }
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+def load_session(path, mmap=True):
+    """
+    Read a session directory.
+    Args:
+        path: Session directory
+        mmap: Memory-map the signal instead of reading it into RAM
+    """
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    if meta.get('format_version', 1) > FORMAT_VERSION:
+        raise ValueError(f"{path} uses format version {meta['format_version']}, "
+                         f"newest supported is {FORMAT_VERSION}")
+    signal = np.load(os.path.join(path, "signal.npy"), mmap_mode='r' if mmap else None)
+    trials = np.load(os.path.join(path, "trials.npy"))
+    return EMGSession(signal, trials, meta['channels'], meta.get('sampling_rate'),
+                      meta.get('filtered', True))
+
+
+def session_from_dataframe(df, sampling_rate=None, filtered=False):
+    """Build a session from the CSV layout, storing label/trial/timestamp once per trial."""
+    from .windowing import META_COLUMNS, segment_bounds
+
+    channels = [c for c in df.columns if c not in META_COLUMNS]
+    bounds = segment_bounds(df)
+    trials = np.zeros(len(bounds), dtype=TRIAL_DTYPE)
+    for i, (start, stop, label) in enumerate(bounds):
+        row = df.iloc[start]
+        trials[i] = (row['trial'] if 'trial' in df else i, label, start, stop,
+                     row['timestamp'] if 'timestamp' in df else 0.0)
+    signal = df[channels].to_numpy(dtype=np.float32)
+    return EMGSession(signal, trials, channels, sampling_rate, filtered)
+
+
+def session_path_for(csv_path):
+    """Session directory that a CSV converts to (same name, SESSION_SUFFIX)."""
+    return os.path.splitext(csv_path)[0] + SESSION_SUFFIX
+
+
+def convert_csv(csv_path, session_path=None, sampling_rate=None):
+    """
+    One-shot conversion of a Signal Files CSV into a session directory.
+    Returns the session directory.
+
+    CSVs from the old per-trial collector are marked unfiltered: its filter
+    call passed an unknown keyword and the exception was swallowed.
+    """
+    import pandas as pd
+    session_path = session_path or session_path_for(csv_path)
+    session = session_from_dataframe(pd.read_csv(csv_path), sampling_rate)
+    save_session(session_path, session.signal, session.trials, session.channels,
+                 session.sampling_rate, session.filtered)
+    return session_path
+
+
+def load_recording(path, mmap=True):
+    """
+    Load a recording from a session directory or a CSV.
+    A CSV path is transparently redirected to its converted session if one exists.
+    """
+    if os.path.isdir(path):
+        return load_session(path, mmap)
+    if path.endswith(".csv"):
+        session_path = session_path_for(path)
+        if os.path.isdir(session_path):
+            return load_session(session_path, mmap)
+        import pandas as pd
+        return session_from_dataframe(pd.read_csv(path))
+    raise FileNotFoundError(f"No recording found at {path}")
+
+
+class SessionWriter:
+    """
+    Writes a session incrementally so long recordings never sit in memory.
+
+    Samples are appended to a raw float32 file as they arrive; close() turns
+    it into signal.npy with a chunked copy and writes the trial table.
+    """
+
+    COPY_CHUNK_BYTES = 4 * 1024 * 1024
+
+    def __init__(self, path, channels, sampling_rate=None, filtered=True):
+        """
+        Args:
+            path: Session directory (created if needed)
+            channels: Channel names, e.g. ["ch1"]
+            sampling_rate: Sampling frequency (Hz)
+            filtered: Whether the appended samples are already filtered
+        """
+        self.path = path
+        self.channels = list(channels)
+        self.sampling_rate = sampling_rate
+        self.filtered = filtered
+        self.n_samples = 0
+        self._trials = []
+        os.makedirs(path, exist_ok=True)
+        self._raw_path = os.path.join(path, "signal.f32.part")
+        self._raw = open(self._raw_path, "wb")
+
+    def append(self, samples):
+        """
+        Args:
+            samples: array of shape (n_samples, n_channels)
+        """
+        samples = np.ascontiguousarray(samples, dtype='<f4')
+        if samples.ndim != 2 or samples.shape[1] != len(self.channels):
+            raise ValueError(f"Samples must have shape (n, {len(self.channels)}), got {samples.shape}")
+        self._raw.write(samples.tobytes())
+        self.n_samples += len(samples)
+
+    def add_trial(self, trial, label, start, stop, timestamp):
+        self._trials.append((trial, label, start, stop, timestamp))
+
+    def close(self):
+        """Finalize signal.npy, trials.npy and meta.json."""
+        if self._raw.closed:
+            return
+        self._raw.close()
+
+        header = {
+            'descr': '<f4',
+            'fortran_order': False,
+            'shape': (self.n_samples, len(self.channels)),
+        }
+        with open(os.path.join(self.path, "signal.npy"), "wb") as out, open(self._raw_path, "rb") as raw:
+            np.lib.format.write_array_header_1_0(out, header)
+            while True:
+                chunk = raw.read(self.COPY_CHUNK_BYTES)
+                if not chunk:
+                    break
+                out.write(chunk)
+        os.remove(self._raw_path)
+
+        np.save(os.path.join(self.path, "trials.npy"), np.array(self._trials, dtype=TRIAL_DTYPE))
+        write_meta(self.path, self.channels, self.sampling_rate, self.filtered)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,128 @@
+import time
+import numpy as np
+from brainflow.board_shim import BoardShim, BoardIds
+from .acquisition import package_counter
+
+
+class ReplayBoard:
+    """
+    Plays a recorded session back through the BoardShim calls the pipeline uses.
+
+    It reports the id of the board it emulates (the Ganglion by default), so
+    BoardShim.get_emg_channels(), the package-number channel and the sampling
+    rate all resolve exactly as for the device, and BoardReader reads it
+    unchanged. Recordings do not keep package ids, so they are generated with
+    the emulated board's counter (for the Ganglion, 1-100 with two samples
+    per id).
+
+    Samples become available as the clock advances, at the given speed:
+
+        speed=1.0   real time
+        speed=4.0   four times faster than real time
+        speed=None  as fast as the consumer reads: every count query releases
+                    max_chunk more samples, regardless of the clock
+    """
+
+    def __init__(self, session, board_id=BoardIds.GANGLION_NATIVE_BOARD, speed=1.0,
+                 loop=False, max_chunk=10):
+        """
+        Args:
+            session: recording.EMGSession to play back (its signal goes to the EMG rows)
+            board_id: Board to emulate
+            speed: Playback speed relative to real time, or None for max speed
+            loop: Start again from the beginning when the recording ends
+            max_chunk: Samples released per count query at max speed
+        """
+        self.board_id = int(board_id)
+        self.signal = np.asarray(session.signal)
+        self.speed = speed
+        self.loop = loop
+        self.max_chunk = max_chunk
+        self.sampling_rate = BoardShim.get_sampling_rate(self.board_id)
+
+        n_channels = self.signal.shape[1]
+        self.emg_rows = BoardShim.get_emg_channels(self.board_id)[:n_channels]
+        if len(self.emg_rows) < n_channels:
+            raise ValueError(f"Recording has {n_channels} channels, board {self.board_id} "
+                             f"only {len(self.emg_rows)} EMG channels")
+        self.num_rows = BoardShim.get_num_rows(self.board_id)
+        self.package_channel = BoardShim.get_package_num_channel(self.board_id)
+        self.timestamp_channel = BoardShim.get_timestamp_channel(self.board_id)
+        self.first_package, self.package_cycle, self.samples_per_package = package_counter(self.board_id)
+
+        self._prepared = False
+        self._streaming = False
+        self._start_time = None
+        self._released = 0   # samples made available so far (may exceed len(signal) when looping)
+        self._consumed = 0   # samples handed out by get_board_data
+
+    # Session lifecycle, as on BoardShim
+    def prepare_session(self):
+        self._prepared = True
+
+    def is_prepared(self):
+        return self._prepared
+
+    def release_session(self):
+        self._streaming = False
+        self._prepared = False
+
+    def start_stream(self, num_samples=None, streamer_params=None):
+        self._start_time = time.perf_counter()
+        self._released = self._consumed = 0
+        self._streaming = True
+
+    def stop_stream(self):
+        self._advance()
+        self._streaming = False
+
+    def get_board_id(self):
+        return self.board_id
+
+    def get_sampling_rate(self, board_id=None):
+        return BoardShim.get_sampling_rate(self.board_id if board_id is None else board_id)
+
+    @property
+    def finished(self):
+        """True once a non-looping replay has handed out every sample."""
+        return not self.loop and self._consumed >= len(self.signal)
+
+    # Data access, as on BoardShim
+    def get_board_data_count(self):
+        self._advance()
+        return self._released - self._consumed
+
+    def get_board_data(self, num_samples=None):
+        """Remove and return up to num_samples of the oldest unread samples."""
+        available = self.get_board_data_count() if num_samples is None else num_samples
+        count = min(available, self._released - self._consumed)
+        data = self._rows(self._consumed, self._consumed + count)
+        self._consumed += count
+        return data
+
+    def get_current_board_data(self, num_samples):
+        """The newest num_samples released samples, without consuming them."""
+        self._advance()
+        return self._rows(max(self._released - num_samples, 0), self._released)
+
+    def _advance(self):
+        if not self._streaming:
+            return
+        if self.speed is None:
+            target = self._consumed + self.max_chunk
+        else:
+            elapsed = time.perf_counter() - self._start_time
+            target = int(elapsed * self.sampling_rate * self.speed)
+        if not self.loop:
+            target = min(target, len(self.signal))
+        self._released = max(self._released, target)
+
+    def _rows(self, start, stop):
+        """Full board rows for absolute sample positions [start, stop)."""
+        positions = np.arange(start, stop)
+        data = np.zeros((self.num_rows, len(positions)))
+        data[self.emg_rows] = self.signal[positions % len(self.signal)].T
+        data[self.package_channel] = (self.first_package
+                                      + positions // self.samples_per_package % self.package_cycle)
+        data[self.timestamp_channel] = self._start_time + positions / (self.sampling_rate * (self.speed or 1.0))
+        return data
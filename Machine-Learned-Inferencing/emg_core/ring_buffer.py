@@ -0,0 +1,72 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Preallocated multi-channel sample store laid out as (n_channels, capacity).
+
+    Every sample is written twice, at position i and i + capacity, so the most
+    recent N samples are always one contiguous slice and latest() never copies.
+    """
+
+    def __init__(self, n_channels, capacity, dtype=np.float64):
+        """
+        Args:
+            n_channels: Number of channels per sample
+            capacity: Maximum number of samples kept
+            dtype: Storage dtype
+        """
+        self.n_channels = n_channels
+        self.capacity = capacity
+        self._data = np.zeros((n_channels, 2 * capacity), dtype=dtype)
+        self._head = 0  # Next write position in [0, capacity)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+    def extend(self, samples):
+        """
+        Append a block of samples in one vectorized copy.
+        Args:
+            samples: array of shape (n_channels, n_samples), i.e. BrainFlow's layout
+        """
+        samples = np.asarray(samples)
+        if samples.ndim != 2 or samples.shape[0] != self.n_channels:
+            raise ValueError(f"Samples must have shape ({self.n_channels}, n_samples), got {samples.shape}")
+
+        n = samples.shape[1]
+        if n == 0:
+            return
+        if n > self.capacity:
+            samples = samples[:, -self.capacity:]
+            n = self.capacity
+
+        cap = self.capacity
+        head = self._head
+        first = min(n, cap - head)
+        self._data[:, head:head + first] = samples[:, :first]
+        self._data[:, head + cap:head + cap + first] = samples[:, :first]
+        rest = n - first
+        if rest:
+            self._data[:, :rest] = samples[:, first:]
+            self._data[:, cap:cap + rest] = samples[:, first:]
+
+        self._head = (head + n) % cap
+        self._count = min(self._count + n, cap)
+
+    def latest(self, n):
+        """
+        Return the most recent n samples, oldest first, as a (n_channels, n) view.
+        The view is only valid until the next call to extend().
+        """
+        if n > self._count:
+            raise ValueError(f"Requested {n} samples but only {self._count} are buffered")
+        end = self._head + self.capacity
+        view = self._data[:, end - n:end]
+        view.flags.writeable = False
+        return view
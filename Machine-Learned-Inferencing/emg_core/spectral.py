@@ -0,0 +1,130 @@
+import queue
+import threading
+from functools import lru_cache
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Frequency bands reported for every channel, in Hz (inclusive; None = Nyquist)
+BANDS = {
+    "low_freq": (0, 20),     # motion artifacts
+    "emg": (20, 90),         # useful EMG
+    "high_freq": (90, None),
+}
+
+
+@lru_cache(maxsize=None)
+def spectrum_layout(fs, nperseg):
+    """
+    Frequencies of a one-sided nperseg-point spectrum and the index slice of
+    every band in BANDS, computed once per (fs, nperseg).
+    Returns:
+        (freqs, {band: slice})
+    """
+    freqs = np.fft.rfftfreq(nperseg, 1 / fs)
+    slices = {}
+    for band, (fmin, fmax) in BANDS.items():
+        fmax = fs / 2 if fmax is None else fmax
+        slices[band] = slice(int(np.searchsorted(freqs, fmin, side="left")),
+                             int(np.searchsorted(freqs, fmax, side="right")))
+    return freqs, slices
+
+
+def band_summary(freqs, psd, slices):
+    """
+    Dominant frequency and per-band power of a PSD, as returned by
+    preprocessing.analyze_signal_frequency.
+    Args:
+        freqs: Evenly spaced frequencies of the last axis of psd
+        psd: Power spectral density, shape (..., len(freqs))
+        slices: Band index slices from spectrum_layout()
+    """
+    df = freqs[1] - freqs[0]
+    total_power = np.trapezoid(psd, dx=df, axis=-1)
+    summary = {
+        'dominant_freq': freqs[np.argmax(psd[..., 1:], axis=-1) + 1],  # Skip DC (0 Hz)
+        'total_power': total_power,
+    }
+    safe_total = np.where(total_power > 0, total_power, 1.0)
+    for band, band_slice in slices.items():
+        power = np.trapezoid(psd[..., band_slice], dx=df, axis=-1)
+        summary[f'{band}_power'] = power
+        summary[f'{band}_percent'] = power / safe_total * 100
+    return summary
+
+
+class SpectralMonitor:
+    """
+    Running PSD of a multi-channel stream, estimated on a worker thread.
+
+    push() only queues the new samples. The worker cuts them into 50%
+    overlapping Hann segments (Welch's method, scipy's density scaling)
+    and folds each segment's periodogram into an exponential average, so
+    every sample is transformed about twice however often the result is
+    read. latest holds the band summary of the current estimate and is
+    replaced, never modified, so reading it on every tick costs nothing.
+    """
+
+    def __init__(self, fs, n_channels, nperseg=128, time_constant=1.0):
+        """
+        Args:
+            fs: Sampling rate (Hz)
+            n_channels: Channels per sample
+            nperseg: Samples per FFT segment (frequency resolution fs / nperseg)
+            time_constant: Seconds over which the average forgets older segments
+        """
+        self.fs = fs
+        self.n_channels = n_channels
+        self.nperseg = nperseg
+        self.hop = nperseg // 2
+        self.freqs, self.slices = spectrum_layout(fs, nperseg)
+        # Periodic Hann window and one-sided density scaling, as scipy.signal.welch
+        self.window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(nperseg) / nperseg)
+        self.scale = np.full(len(self.freqs), 2.0 / (fs * np.sum(self.window ** 2)))
+        self.scale[0] /= 2
+        if nperseg % 2 == 0:
+            self.scale[-1] /= 2
+        self.alpha = 1 - np.exp(-self.hop / (fs * time_constant))
+
+        self.psd = None      # (n_channels, n_freqs), worker thread only
+        self.latest = None   # band_summary() of psd, None until the first segment
+        self.segments = 0
+        self._pending = np.empty((0, n_channels))
+        self._queue = queue.SimpleQueue()
+        self._worker = threading.Thread(target=self._run, name="spectral-monitor", daemon=True)
+        self._worker.start()
+
+    def push(self, samples):
+        """
+        Queue newly arrived samples. Safe to call from the hot loop.
+        Args:
+            samples: array of shape (n_samples, n_channels)
+        """
+        self._queue.put(np.array(samples, dtype=np.float64))
+
+    def close(self, timeout=1.0):
+        self._queue.put(None)
+        self._worker.join(timeout)
+
+    def _run(self):
+        while True:
+            samples = self._queue.get()
+            if samples is None:
+                return
+            self._pending = np.concatenate([self._pending, samples])
+            if len(self._pending) >= self.nperseg:
+                self._process()
+
+    def _process(self):
+        n_segments = (len(self._pending) - self.nperseg) // self.hop + 1
+        # (n_segments, n_channels, nperseg) views, mean removed as welch's detrend='constant'
+        segments = sliding_window_view(self._pending, self.nperseg, axis=0)[:n_segments * self.hop:self.hop]
+        segments = segments - segments.mean(axis=-1, keepdims=True)
+        periodograms = np.abs(np.fft.rfft(segments * self.window, axis=-1)) ** 2 * self.scale
+
+        psd = periodograms[0] if self.psd is None else self.psd  # first segment seeds the average
+        for periodogram in periodograms:
+            psd = psd + self.alpha * (periodogram - psd)
+        self.psd = psd
+        self.segments += n_segments
+        self._pending = self._pending[n_segments * self.hop:]
+        self.latest = band_summary(self.freqs, psd, self.slices)
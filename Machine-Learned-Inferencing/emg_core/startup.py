@@ -0,0 +1,51 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """
+    Wall-clock timeline of named startup stages.
+
+    Stages may run concurrently on different threads; each one is recorded
+    with its start and end relative to t0 so overlap is visible in report().
+    """
+
+    def __init__(self, t0=None):
+        """
+        Args:
+            t0: time.perf_counter() value everything is measured from (default: now)
+        """
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.stages = []  # (name, start, end, thread name), seconds since t0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, start, time.perf_counter())
+
+    def mark(self, name):
+        """Record an instant, e.g. the first prediction."""
+        now = time.perf_counter()
+        self._record(name, now, now)
+
+    def elapsed(self):
+        return time.perf_counter() - self.t0
+
+    def _record(self, name, start, end):
+        with self._lock:
+            self.stages.append((name, start - self.t0, end - self.t0, threading.current_thread().name))
+
+    def report(self):
+        lines = ["Startup timing (ms since launch):"]
+        for name, start, end, thread in sorted(self.stages, key=lambda s: s[1]):
+            if end == start:
+                lines.append(f"  {name:<30s} at {start * 1e3:7.0f}")
+            else:
+                lines.append(f"  {name:<30s} {start * 1e3:7.0f} -> {end * 1e3:7.0f}  "
+                             f"({(end - start) * 1e3:6.0f})  [{thread}]")
+        return "\n".join(lines)
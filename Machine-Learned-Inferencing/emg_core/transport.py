@@ -0,0 +1,231 @@
+# Event-driven TCP servers for game clients. The classifier (running in its
+# own thread) calls publish(); every connected client gets the new state
+# immediately as a small framed binary message. Each client has its own
+# bounded queue, so a slow client only ever falls behind on stale states
+# and never delays the others.
+#
+# Raw EMG is streamed losslessly the same way: only samples that arrived
+# since the previous frame are sent, as little-endian float32 with a small
+# header, instead of re-sending a repr() of the whole board buffer.
+
+import asyncio
+import logging
+import socket
+import struct
+import time
+import numpy as np
+
+# Frame = uint16 payload length + payload (all little-endian)
+# Gesture payload = uint8 message type, float64 timestamp, uint8 class, float32 confidence
+FRAME_HEADER = struct.Struct("<H")
+GESTURE_PAYLOAD = struct.Struct("<BdBf")
+MSG_GESTURE = 1
+
+
+def encode_gesture(timestamp, gesture, confidence):
+    payload = GESTURE_PAYLOAD.pack(MSG_GESTURE, timestamp, gesture, confidence)
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def encode_ascii(timestamp, gesture, confidence):
+    """Old sockets.py format: the class as a bare ASCII digit, no framing."""
+    return str(gesture).encode('utf-8')
+
+
+class FrameServer:
+    """
+    Asyncio TCP server that broadcasts byte frames to every connected client.
+
+    broadcast() may be called from any thread. Each client has its own
+    bounded queue: when a client falls behind, its oldest frame is dropped,
+    so one slow reader never holds up the others.
+    """
+
+    # Send the last frame to new clients so they start from the current state
+    replay_latest = True
+
+    def __init__(self, host='', port=50007, client_queue_size=4):
+        """
+        Args:
+            host: Interface to bind ('' = all)
+            port: TCP port
+            client_queue_size: Frames buffered per client before the oldest is dropped
+        """
+        self.host = host
+        self.port = port
+        self.client_queue_size = client_queue_size
+        self.dropped_frames = 0
+        self._clients = set()
+        self._latest = None
+        self._loop = None
+        self._server = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # the real port when bound to 0
+        logging.info(f"{type(self).__name__} listening on {self.host or '*'}:{self.port}")
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    def broadcast(self, frame):
+        """Queue a frame for all clients. Safe to call from any thread."""
+        self._loop.call_soon_threadsafe(self._broadcast, frame)
+
+    @property
+    def n_clients(self):
+        return len(self._clients)
+
+    def _broadcast(self, frame):
+        self._latest = frame
+        for queue in self._clients:
+            self._offer(queue, frame)
+
+    def _offer(self, queue, frame):
+        if queue.full():
+            queue.get_nowait()  # drop the oldest (stale) state
+            self.dropped_frames += 1
+        queue.put_nowait(frame)
+
+    async def _handle_client(self, reader, writer):
+        addr = writer.get_extra_info('peername')
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        logging.info(f"Connected by {addr}")
+
+        queue = asyncio.Queue(maxsize=self.client_queue_size)
+        if self.replay_latest and self._latest is not None:
+            queue.put_nowait(self._latest)
+        self._clients.add(queue)
+        sender = asyncio.create_task(self._send_loop(queue, writer))
+        try:
+            # The only thing clients send is 'end' before disconnecting
+            while True:
+                data = await reader.read(1024)
+                if not data or data.strip() == b'end':
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.discard(queue)
+            sender.cancel()
+            writer.close()
+            logging.info(f"Disconnected {addr}")
+
+    async def _send_loop(self, queue, writer):
+        try:
+            while True:
+                frame = await queue.get()
+                writer.write(frame)
+                await writer.drain()  # waits only on this client's socket
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+
+class GestureServer(FrameServer):
+    """Pushes classifier outputs (timestamp, class, confidence) to game clients."""
+
+    def __init__(self, host='', port=50007, client_queue_size=4, encoder=encode_gesture):
+        """
+        Args:
+            host: Interface to bind ('' = all)
+            port: TCP port
+            client_queue_size: Frames buffered per client before the oldest is dropped
+            encoder: Function (timestamp, gesture, confidence) -> bytes
+        """
+        super().__init__(host, port, client_queue_size)
+        self.encoder = encoder
+
+    def publish(self, gesture, confidence=1.0, timestamp=None):
+        """Push a new classifier output to all clients. Safe to call from any thread."""
+        self.broadcast(self.encoder(time.time() if timestamp is None else timestamp, gesture, confidence))
+
+
+def read_gestures(host='127.0.0.1', port=50007):
+    """
+    Minimal blocking client: yields (timestamp, gesture, confidence) per frame.
+    """
+    with socket.create_connection((host, port)) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        stream = sock.makefile('rb')
+        while True:
+            header = stream.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                return
+            (length,) = FRAME_HEADER.unpack(header)
+            payload = stream.read(length)
+            if len(payload) < length:
+                return
+            msg_type, timestamp, gesture, confidence = GESTURE_PAYLOAD.unpack(payload)
+            if msg_type == MSG_GESTURE:
+                yield timestamp, gesture, confidence
+
+
+# Frame = header + float32 samples, sample-major: s0c0, s0c1, ..., s1c0, ...
+# Header = uint32 sequence number, uint16 channel count, uint16 sample count
+RAW_HEADER = struct.Struct("<IHH")
+MAX_FRAME_SAMPLES = 0xFFFF
+
+
+def encode_raw(sequence, samples):
+    """
+    Args:
+        sequence: Frame sequence number (wraps at 2**32)
+        samples: array of shape (n_samples, n_channels)
+    """
+    samples = np.ascontiguousarray(samples, dtype='<f4')
+    n_samples, n_channels = samples.shape
+    return RAW_HEADER.pack(sequence & 0xFFFFFFFF, n_channels, n_samples) + samples.tobytes()
+
+
+class RawStreamServer(FrameServer):
+    """
+    Broadcasts new board samples to every connected client.
+
+    A sequence number on every frame lets clients detect frames they lost by
+    falling too far behind (their queue drops the oldest frame when full).
+    """
+
+    # A partial stream is useless to a new client, so it starts at the next frame
+    replay_latest = False
+
+    def __init__(self, host='', port=50008, client_queue_size=256):
+        super().__init__(host, port, client_queue_size)
+        self.sequence = 0
+
+    def publish(self, samples):
+        """
+        Send new samples to all clients. Safe to call from any thread.
+        Args:
+            samples: array of shape (n_samples, n_channels)
+        """
+        for start in range(0, len(samples), MAX_FRAME_SAMPLES):
+            self.broadcast(encode_raw(self.sequence, samples[start:start + MAX_FRAME_SAMPLES]))
+            self.sequence += 1
+
+
+def _read_exact(stream, n):
+    data = stream.read(n)
+    return data if len(data) == n else None
+
+
+def read_raw_frames(host='127.0.0.1', port=50008):
+    """
+    Blocking client: yields (sequence, samples) with samples of shape (n_samples, n_channels).
+    Compare consecutive sequence numbers to detect lost frames.
+    """
+    with socket.create_connection((host, port)) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        stream = sock.makefile('rb')
+        while True:
+            header = _read_exact(stream, RAW_HEADER.size)
+            if header is None:
+                return
+            sequence, n_channels, n_samples = RAW_HEADER.unpack(header)
+            payload = _read_exact(stream, 4 * n_channels * n_samples)
+            if payload is None:
+                return
+            yield sequence, np.frombuffer(payload, dtype='<f4').reshape(n_samples, n_channels)
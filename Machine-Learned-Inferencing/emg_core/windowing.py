@@ -0,0 +1,153 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+META_COLUMNS = ['label', 'trial', 'timestamp']
+
+
+class WindowSet:
+    """
+    Training windows kept as start offsets into one contiguous recording.
+
+    Nothing is copied until take() is called, so overlapping windows cost
+    one int per window instead of window_size * n_channels floats.
+    """
+
+    def __init__(self, signal, starts, labels, window_size, start_limits=None):
+        """
+        Args:
+            signal: array of shape (n_samples, n_channels)
+            starts: start sample of every window
+            labels: label of every window
+            window_size: Samples per window
+            start_limits: Optional (n_windows, 2) array with the first and last start
+                each window may be shifted to without leaving its trial
+        """
+        self.signal = signal
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.labels = np.asarray(labels)
+        self.window_size = window_size
+        if start_limits is None:
+            start_limits = np.stack([self.starts, self.starts], axis=1)
+        self.start_limits = np.asarray(start_limits, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        """Single window as a (window_size, n_channels) view."""
+        start = self.starts[i]
+        return self.signal[start:start + self.window_size]
+
+    @property
+    def n_channels(self):
+        return self.signal.shape[1]
+
+    def view(self):
+        """
+        All windows as one strided (n_windows, window_size, n_channels) view.
+        Only possible when the windows are evenly spaced (one recording, one step).
+        """
+        if len(self) < 2:
+            step = 1
+        else:
+            steps = np.diff(self.starts)
+            if not np.all(steps == steps[0]) or steps[0] <= 0:
+                raise ValueError("Windows are not evenly spaced; use take() instead")
+            step = int(steps[0])
+        all_windows = sliding_window_view(self.signal, self.window_size, axis=0)
+        first = self.starts[0] if len(self) else 0
+        return all_windows[first:first + step * len(self):step].transpose(0, 2, 1)
+
+    def take(self, idx=None):
+        """
+        Materialize windows into a contiguous (n, window_size, n_channels) array.
+        Args:
+            idx: Window indices or boolean mask (default: all windows)
+        """
+        starts = self.starts if idx is None else self.starts[idx]
+        return self.signal[starts[:, np.newaxis] + np.arange(self.window_size)]
+
+    def subset(self, idx):
+        """WindowSet over the same recording restricted to idx."""
+        return WindowSet(self.signal, self.starts[idx], self.labels[idx], self.window_size,
+                         self.start_limits[idx])
+
+    def sample_weights(self):
+        """How many windows cover each sample of the recording."""
+        coverage = np.zeros(len(self.signal) + 1, dtype=np.int64)
+        np.add.at(coverage, self.starts, 1)
+        np.add.at(coverage, self.starts + self.window_size, -1)
+        return np.cumsum(coverage[:-1])
+
+    def mean_std(self):
+        """
+        Per-channel mean and std over all windows, identical to
+        np.mean/np.std(windows, axis=(0, 1), keepdims=True) without building them.
+        """
+        weights = self.sample_weights().astype(np.float64)
+        total = weights.sum()
+        mean = (weights @ self.signal) / total
+        var = (weights @ (self.signal - mean) ** 2) / total
+        return mean.reshape(1, 1, -1), np.sqrt(var).reshape(1, 1, -1)
+
+    def normalized(self, mean, std, eps=1e-8):
+        """Same windows over (signal - mean) / (std + eps), normalized once per sample."""
+        signal = (self.signal - mean.reshape(1, -1)) / (std.reshape(1, -1) + eps)
+        return WindowSet(signal, self.starts, self.labels, self.window_size, self.start_limits)
+
+    def mean_window(self, idx=None):
+        """Average window of shape (window_size, n_channels) without materializing."""
+        starts = self.starts if idx is None else self.starts[idx]
+        return np.stack([self.signal[starts + k].mean(axis=0) for k in range(self.window_size)])
+
+
+def segment_bounds(df):
+    """
+    (start, stop, label) for every contiguous run of rows sharing label and trial,
+    so that windows never straddle two recordings.
+    """
+    keys = [c for c in ('label', 'trial') if c in df.columns]
+    values = df[keys].to_numpy()
+    changes = np.flatnonzero(np.any(values[1:] != values[:-1], axis=1)) + 1
+    starts = np.concatenate(([0], changes))
+    stops = np.concatenate((changes, [len(df)]))
+    labels = df['label'].to_numpy()[starts]
+    return list(zip(starts, stops, labels))
+
+
+def windows_from_segments(signal, segments, window_size, step):
+    """
+    Build a WindowSet over signal with windows placed inside each (start, stop, label) segment.
+    Args:
+        signal: array of shape (n_samples, n_channels)
+        segments: iterable of (start, stop, label)
+        window_size: Samples per window
+        step: Samples between consecutive window starts
+    """
+    starts, labels, limits = [], [], []
+    for start, stop, label in segments:
+        seg_starts = np.arange(start, stop - window_size + 1, step)
+        starts.append(seg_starts)
+        labels.append(np.full(len(seg_starts), label))
+        limits.append(np.tile([start, stop - window_size], (len(seg_starts), 1)))
+    return WindowSet(signal, np.concatenate(starts), np.concatenate(labels), window_size,
+                     np.concatenate(limits))
+
+
+def windows_from_session(session, window_size, step):
+    """Build a WindowSet from a recording.EMGSession (one segment per trial)."""
+    return windows_from_segments(session.signal, session.segments(), window_size, step)
+
+
+def windows_from_dataframe(df, window_size, step, feature_columns=None):
+    """
+    Build a WindowSet from a Signal Files dataframe ([ch1, ..., label, trial, timestamp]).
+    Args:
+        df: Recording dataframe
+        window_size: Samples per window
+        step: Samples between consecutive window starts
+        feature_columns: Signal columns (default: everything except label/trial/timestamp)
+    """
+    if feature_columns is None:
+        feature_columns = [c for c in df.columns if c not in META_COLUMNS]
+    return windows_from_segments(df[feature_columns].to_numpy(), segment_bounds(df), window_size, step)
@@ -1,11 +1,15 @@
-import logging
-from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds
+from brainflow.board_shim import BoardShim
 from brainflow.data_filter import DataFilter, FilterTypes
 import numpy as np
 import time
 import pandas as pd
-from scipy.signal import iirnotch, filtfilt, butter
 import os
+import sys
+
+# Shared filters live next to the propulsion pipeline
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Machine-Learned-Inferencing"))
+from emg_core.acquisition import create_board, active_emg_channels
+from emg_core.preprocessing import StreamingFilter
 
 # Define directory structure
 BASE_DIR = "EMG Files"
@@ -28,38 +32,10 @@ GESTURES = {
     "scissors": 2
 }
 
-def apply_notch_filter(data, fs, notch_freq=60.0, quality_factor=30.0):
-    """
-    Apply a notch filter to remove powerline noise (e.g., 60 Hz).
-    Args:
-        data: 1D array of signal data
-        fs: Sampling frequency (Hz)
-        notch_freq: Frequency to remove (Hz)
-        quality_factor: Quality factor for the notch filter
-    Returns:
-        Filtered signal
-    """
-    b, a = iirnotch(notch_freq, quality_factor, fs)
-    return filtfilt(b, a, data)
-
-def apply_highpass_filter(data, fs, cutoff=20.0, order=4):
-    """
-    Apply a highpass filter to remove low-frequency noise and motion artifacts.
-    This is more appropriate for low sampling rates.
-    """
-    x = np.asarray(data, dtype=float).ravel()
-    nyq = 0.5 * fs
-    high = cutoff / nyq
-    b, a = butter(order, high, btype='high')
-    padlen_needed = 3 * (max(len(a), len(b)) - 1)
-    if x.size <= padlen_needed:
-        return lfilter(b, a, x)
-    return filtfilt(b, a, x)
-
 def collect_data_for_gesture(board, gesture_name, trial_num, duration=5):
     """
     Record EMG data for one gesture for the given duration.
-    Applies bandpass and notch filters to remove noise.
+    Applies highpass and notch filters to remove noise.
     Returns a pandas DataFrame with columns: [ch1, ch2, ..., label, trial, timestamp]
     """
     print(f"\nGet ready for: {gesture_name.upper()} (Trial {trial_num}) — starting in 3 seconds...")
@@ -75,21 +51,15 @@ def collect_data_for_gesture(board, gesture_name, trial_num, duration=5):
     
     data = board.get_board_data()
     # Extract only active EMG channels
-    emg_channels = BoardShim.get_emg_channels(board.get_board_id())
-    active_channel_indices = [emg_channels[i] for i in ACTIVE_CHANNELS]
+    active_channel_indices = active_emg_channels(board, ACTIVE_CHANNELS)
+    sampling_rate = BoardShim.get_sampling_rate(board.get_board_id())
     
     print(f"  Using channels: {ACTIVE_CHANNELS} (indices: {active_channel_indices})")
     
-    # Apply filters only to active channels
-    for ch in active_channel_indices:
-        try:
-            data[ch] = apply_bandpass_filter(data[ch], sampling_rate, lowcut=20.0)
-            data[ch] = apply_notch_filter(data[ch], sampling_rate)
-        except Exception as e:
-            print(f"  Warning: Filter failed for channel {ch}: {e}")
-    
-    # Extract only active channels
-    emg_data = data[active_channel_indices].T  # Transpose to (samples, channels)
+    # Extract only active channels and filter them together with the causal
+    # filter RPS_Predict runs live, so training windows look like live ones
+    emg_data = StreamingFilter(sampling_rate, len(ACTIVE_CHANNELS)).process(
+        data[active_channel_indices].T)  # (samples, channels)
     
     # Create DataFrame with only active channels
     n_channels = len(ACTIVE_CHANNELS)
@@ -104,18 +74,8 @@ def collect_data_for_gesture(board, gesture_name, trial_num, duration=5):
 
 def main():
     # Configure board
-    BoardShim.enable_dev_board_logger()
-    logging.basicConfig(level=logging.INFO)
-
-    params = BrainFlowInputParams()
-    params.serial_port = "COM4"
-    params.timeout = 15
-    params.master_board = BoardIds.GANGLION_NATIVE_BOARD
-        
-    board = BoardShim(params.master_board, params)
-    
     print("Preparing session...")
-    board.prepare_session()
+    board = create_board()
     
     emg_channels = BoardShim.get_emg_channels(board.get_board_id())
     sampling_rate = board.get_sampling_rate(board.get_board_id())
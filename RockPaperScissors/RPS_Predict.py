@@ -1,146 +1,44 @@
 import numpy as np
-from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds
-from brainflow.data_filter import DataFilter, FilterTypes
-from scipy.signal import iirnotch, filtfilt, butter, lfilter, welch
-import logging
-import joblib
+from brainflow.board_shim import BoardShim
 import time
-from collections import deque
-import tensorflow as tf
 import os
+import sys
+
+# Shared helpers live next to the propulsion pipeline
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Machine-Learned-Inferencing"))
+from emg_core.acquisition import BoardReader, create_board, active_emg_channels
+from emg_core.artifacts import ModelArtifacts
+from emg_core.preprocessing import StreamingFilter, analyze_signal_frequency
+from emg_core.ring_buffer import RingBuffer
 
 # Define directory structure (same as above)
 BASE_DIR = "EMG Files"
-MODEL_DIR = os.path.join(BASE_DIR, "Model Files")
-ENCODER_DIR = os.path.join(BASE_DIR, "Encoder Files")
-NORM_DIR = os.path.join(BASE_DIR, "Normalization Files")
 
-# Load files from appropriate directories
-model = tf.keras.models.load_model(os.path.join(MODEL_DIR, "emg_cnn_model_6(200_window).keras"))
-label_encoder = joblib.load(os.path.join(ENCODER_DIR, "emg_label_encoder_6(200_window).pkl"))
-norm_params = joblib.load(os.path.join(NORM_DIR, "emg_normalization_6(200_window).pkl"))
+# Training run whose model, encoder and normalization are used
+MODEL_TAG = "6(200_window)"
+INFERENCE_BACKEND = "keras"  # only the .keras model exists for this game
 
 ACTIVE_CHANNELS = [0]  # EMG channels to use
 
-X_mean = norm_params['mean'].squeeze()  # Remove extra dimensions
-X_std = norm_params['std'].squeeze()  # Remove extra dimensions
-window_size = norm_params['window_size']
-
 # Map numeric predictions to gesture names
 GESTURE_NAMES = {0: "Rock", 1: "Paper", 2: "Scissors"}
 
-def apply_notch_filter(data, fs, notch_freq=60.0, quality_factor=30.0):
-    """
-    Apply a notch filter to remove powerline noise (e.g., 60 Hz).
-    Args:
-        data: 1D array of signal data
-        fs: Sampling frequency (Hz)
-        notch_freq: Frequency to remove (Hz)
-        quality_factor: Quality factor for the notch filter
-    Returns:
-        Filtered signal
-    """
-    x = np.asarray(data, dtype=float).ravel()
-    b, a = iirnotch(notch_freq, quality_factor, fs)
-    padlen_needed = 3 * (max(len(a), len(b)) - 1)
-    if x.size <= padlen_needed:
-        return lfilter(b, a, x)
-    return filtfilt(b, a, x)
-
-def apply_highpass_filter(data, fs, cutoff=20.0, order=4):
-    """
-    Apply a highpass filter to remove low-frequency noise and motion artifacts.
-    This is more appropriate for low sampling rates.
-    """
-    x = np.asarray(data, dtype=float).ravel()
-    nyq = 0.5 * fs
-    high = cutoff / nyq
-    b, a = butter(order, high, btype='high')
-    padlen_needed = 3 * (max(len(a), len(b)) - 1)
-    if x.size <= padlen_needed:
-        return lfilter(b, a, x)
-    return filtfilt(b, a, x)
-
-def analyze_signal_frequency(signal, fs):
-    """
-    Analyze the frequency content of a signal using Welch's method.
-    Returns dominant frequency and power spectrum info.
-    """
-    # Use Welch's method to estimate power spectral density
-    freqs, psd = welch(signal, fs=fs, nperseg=min(256, len(signal)))
-    
-    # Find dominant frequency (excluding DC component)
-    dominant_idx = np.argmax(psd[1:]) + 1  # Skip DC (0 Hz)
-    dominant_freq = freqs[dominant_idx]
-    
-    # Calculate power in different frequency bands
-    def band_power(freqs, psd, fmin, fmax):
-        idx = np.logical_and(freqs >= fmin, freqs <= fmax)
-        return np.trapezoid(psd[idx], freqs[idx])
-    
-    total_power = np.trapezoid(psd, freqs)
-    low_freq_power = band_power(freqs, psd, 0, 20)  # 0-20 Hz (motion artifacts)
-    emg_power = band_power(freqs, psd, 20, 90)  # 20-90 Hz (useful EMG)
-    high_freq_power = band_power(freqs, psd, 90, fs/2)  # Above 90 Hz
-    
-    return {
-        'dominant_freq': dominant_freq,
-        'total_power': total_power,
-        'low_freq_power': low_freq_power,
-        'emg_power': emg_power,
-        'high_freq_power': high_freq_power,
-        'low_freq_percent': (low_freq_power / total_power) * 100,
-        'emg_percent': (emg_power / total_power) * 100,
-        'high_freq_percent': (high_freq_power / total_power) * 100
-    }
-
-def predict_gesture(window):
-    """
-    Predict gesture from a window of EMG data.
-    Args:
-        window: numpy array of shape (window_size, n_channels)
-    Returns:
-        Predicted gesture name and confidence
-    """
-    # Ensure window is the right shape
-    window = np.array(window)
-    if window.ndim != 2:
-        raise ValueError(f"Window must be 2D, got shape {window.shape}")
-    
-    # Normalize using training statistics
-    window_normalized = (window - X_mean) / (X_std + 1e-8)
-    
-    # Add batch dimension: (window_size, n_channels) -> (1, window_size, n_channels)
-    window_batch = window_normalized.reshape(1, window_size, -1)
-    
-    # Predict
-    predictions = model.predict(window_batch, verbose=0)[0]
-    predicted_class = np.argmax(predictions)
-    confidence = predictions[predicted_class]
-    
-    # Get gesture name
-    gesture_label = label_encoder.inverse_transform([predicted_class])[0]
-    gesture_name = GESTURE_NAMES.get(int(gesture_label), f"Unknown ({gesture_label})")
-    
-    return gesture_name, confidence, predictions
-
 def main():
-    BoardShim.enable_dev_board_logger()
-    logging.basicConfig(level=logging.INFO)
+    # Artifacts are only read here, not at import time
+    artifacts = ModelArtifacts(BASE_DIR, MODEL_TAG)
+    window_size = artifacts.window_size
+    classifier = artifacts.load_classifier(INFERENCE_BACKEND, len(ACTIVE_CHANNELS), GESTURE_NAMES)
 
-    params = BrainFlowInputParams()
-    params.serial_port = "COM4"
-    params.timeout = 15
-    params.master_board = BoardIds.GANGLION_NATIVE_BOARD
-        
-    board = BoardShim(params.master_board, params)
-    board.prepare_session()
+    board = create_board()
     board.start_stream()
 
     emg_channels = BoardShim.get_emg_channels(board.get_board_id())
-    active_channel_indices = [emg_channels[i] for i in ACTIVE_CHANNELS]
+    active_channel_indices = active_emg_channels(board, ACTIVE_CHANNELS)
     sampling_rate = board.get_sampling_rate(board.get_board_id())
     n_channels = len(ACTIVE_CHANNELS)
+
+    # Hands each sample to the pipeline exactly once
+    reader = BoardReader(board, active_channel_indices)
     
     print(f"EMG channels: {emg_channels}")
     print(f"Sampling rate: {sampling_rate} Hz")
@@ -149,9 +47,13 @@ def main():
     print("\nStarting real-time prediction with signal analysis...")
     print("Press Ctrl+C to stop.\n")
 
+    # Causal highpass + notch, as in training; designed once, state carried across ticks
+    stream_filter = StreamingFilter(sampling_rate, n_channels)
+
     BUFFER_SECONDS = 1
-    # Buffer to store incoming data
-    data_buffer = deque(maxlen=int(BUFFER_SECONDS * sampling_rate))
+    # Preallocated buffers to store incoming raw and filtered data
+    data_buffer = RingBuffer(n_channels, max(int(BUFFER_SECONDS * sampling_rate), window_size))
+    filtered_buffer = RingBuffer(n_channels, window_size, dtype=np.float32)
     
     # Counter for periodic detailed analysis
     analysis_counter = 0
@@ -159,19 +61,19 @@ def main():
     
     try:
         while True:
-            # Get recent data
-            data = board.get_current_board_data(200)
+            # Get only the samples that arrived since the last tick
+            data = reader.read()
             
             if data.shape[1] > 0:
-                # Extract EMG data and add to buffer
-                for i in range(data.shape[1]):
-                    sample = data[active_channel_indices, i]
-                    data_buffer.append(sample)
+                # Filter only the new samples and add both to their buffers
+                filtered_samples = stream_filter.process(data.T)
+                data_buffer.extend(data)
+                filtered_buffer.extend(filtered_samples.T)
                 
                 # Once we have enough data, make prediction
                 if len(data_buffer) >= window_size:
-                    # Convert buffer to array
-                    window = np.array(list(data_buffer)[-window_size:])  # Shape: (window_size, n_channels)
+                    # View of the latest samples
+                    window = data_buffer.latest(window_size).T  # Shape: (window_size, n_channels)
                     
                     # Raw signal statistics
                     raw_min = np.min(window)
@@ -179,17 +81,10 @@ def main():
                     raw_mean = np.mean(window)
                     raw_std = np.std(window)
                     
-                    # Apply filters to each channel
-                    filtered_window = np.zeros_like(window)
-                    for ch_idx in range(window.shape[1]):
-                        filtered_window[:, ch_idx] = apply_highpass_filter(
-                            window[:, ch_idx], sampling_rate
-                        )
-                        filtered_window[:, ch_idx] = apply_notch_filter(
-                            filtered_window[:, ch_idx], sampling_rate
-                        )
+                    # Filtered samples were produced incrementally as they arrived
+                    filtered_window = filtered_buffer.latest(window_size).T
                     
-                    gesture_name, confidence, all_probs = predict_gesture(filtered_window)
+                    gesture_name, confidence, all_probs = classifier.predict(filtered_window)
                     
                     # Periodic detailed frequency analysis
                     analysis_counter += 1
@@ -225,6 +120,7 @@ def main():
                     # Display prediction with signal stats
                     print(f"\rPredicted: {gesture_name:10s} | Conf: {confidence:.2%} | "
                           f"Raw: [{raw_min:6.1f}, {raw_max:6.1f}] μ={raw_mean:6.1f} σ={raw_std:5.1f} | "
+                          f"Dropped: {reader.dropped_packets} | "
                           f"[R:{all_probs[0]:.2f} P:{all_probs[1]:.2f} S:{all_probs[2]:.2f}]", 
                           end='', flush=True)
             
@@ -1,4 +1,3 @@
-import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
@@ -7,6 +6,12 @@ from tensorflow import keras
 from tensorflow.keras import layers
 import joblib
 import os
+import sys
+
+# Shared helpers live next to the propulsion pipeline
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Machine-Learned-Inferencing"))
+from emg_core.windowing import windows_from_session
+from emg_core.recording import load_recording
 
 # Define directory structure (same as above)
 BASE_DIR = "EMG Files"
@@ -20,27 +25,18 @@ os.makedirs(MODEL_DIR, exist_ok=True)
 os.makedirs(ENCODER_DIR, exist_ok=True)
 os.makedirs(NORM_DIR, exist_ok=True)
 
-# Load data from signal directory
-df = pd.read_csv(os.path.join(SIGNAL_DIR, "emg_signals_6(200_window).csv"))
+# Load data from signal directory (uses the converted binary session when present)
+recording = load_recording(os.path.join(SIGNAL_DIR, "emg_signals_6(200_window).csv"))
 window_size = 200  # ~400 ms at 200 Hz sampling rate
 overlap = int(window_size * 0.25)  # 25% overlap
 
-# Extract raw windows (no feature extraction needed for CNN)
-X_windows = []
-y_labels = []
-
-for gesture in sorted(df['label'].unique()):
-    subset = df[df['label'] == gesture].drop(['label', 'trial', 'timestamp'], axis=1, errors='ignore').values
-    for i in range(0, len(subset) - window_size, overlap):
-        window = subset[i:i+window_size, :]  # Shape: (samples, channels)
-        X_windows.append(window)
-        y_labels.append(gesture)
-
-X_windows = np.array(X_windows)
-y_labels = np.array(y_labels)
+# Raw windows (no feature extraction needed for CNN), kept as offsets into the recording.
+# Windows never straddle two trials and are only copied out when the model needs them.
+windows = windows_from_session(recording, window_size, overlap)
+y_labels = windows.labels
 
-print(f"Total windows: {len(X_windows)}")
-print(f"Window shape: {X_windows[0].shape}")
+print(f"Total windows: {len(windows)}")
+print(f"Window shape: {(window_size, windows.n_channels)}")
 print(f"Label distribution: {np.unique(y_labels, return_counts=True)}")
 
 # Encode labels
@@ -51,15 +47,16 @@ n_classes = len(label_encoder.classes_)
 print(f"\nClasses: {label_encoder.classes_}")
 print(f"Number of classes: {n_classes}")
 
-# Normalize data (per channel)
-X_mean = np.mean(X_windows, axis=(0, 1), keepdims=True)
-X_std = np.std(X_windows, axis=(0, 1), keepdims=True)
-X_normalized = (X_windows - X_mean) / (X_std + 1e-8)
+# Normalize data (per channel), same statistics as over the stacked windows
+X_mean, X_std = windows.mean_std()
+normalized_windows = windows.normalized(X_mean, X_std)
 
 # Split data with larger test set for better evaluation
-X_train, X_test, y_train, y_test = train_test_split(
-    X_normalized, y_encoded, test_size=0.25, random_state=42, stratify=y_encoded
+train_idx, test_idx, y_train, y_test = train_test_split(
+    np.arange(len(windows)), y_encoded, test_size=0.25, random_state=42, stratify=y_encoded
 )
+X_train = normalized_windows.take(train_idx)
+X_test = normalized_windows.take(test_idx)
 
 print(f"\nTraining samples: {len(X_train)}")
 print(f"Test samples: {len(X_test)}")
@@ -5,36 +5,37 @@
 # a fist clench to jetpack activation.
 
 import logging
-from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds
+from brainflow.board_shim import BoardShim
 import numpy as np
 import time
+import os
+import sys
+
+# Shared acquisition helpers live with the ML pipeline
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Machine-Learned-Inferencing"))
+from emg_core.acquisition import BoardReader, create_board
+from emg_core.ring_buffer import RingBuffer
 
 N = 50 # number of samples to consider for rolling average
 THRESHOLD = 200  # threshold for determining clenched vs relaxed
 
 # configure board
-BoardShim.enable_dev_board_logger()
-logging.basicConfig(level=logging.DEBUG)
-
-params = BrainFlowInputParams()
-params.serial_port = "COM4"
-params.timeout = 15
-params.master_board = BoardIds.GANGLION_NATIVE_BOARD
-    
-board_shim = BoardShim(params.master_board, params)
-
-board_shim.prepare_session()
+board_shim = create_board(log_level=logging.DEBUG)
 board_shim.start_stream()
 
 # get EEG channels (or whichever channels you need)
 emg_channels = BoardShim.get_emg_channels(board_shim.get_board_id())
 
+# read each new sample once and keep the last N of them
+reader = BoardReader(board_shim, [emg_channels[0]])
+window = RingBuffer(1, N)
+
 while True:
-    # fetch up to the last N data points (for each channel)
-    data = board_shim.get_current_board_data(N)  
+    # consume only the data points that arrived since the last poll
+    window.extend(reader.read())
 
-    channel_data = data[1]  # most recent <=N samples
-    if len(channel_data) > 0:
+    if len(window) > 0:
+        channel_data = window.latest(len(window))[0]  # most recent <=N samples
         rolling_avg = np.mean(channel_data)
         print(f"Rolling Avg = {rolling_avg:.3f}")
         if abs(rolling_avg) > THRESHOLD:
@@ -1,104 +1,101 @@
-import socket
-import logging
-import time
-import numpy as np
-
-from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds, BrainFlowPresets
-
-###### VARS
-#TCP Socket
-HOST = ''
-PORT = 50007
-
-isRunning = True
-
-num_points = 0
-sampleRate = 0
-
-#Data
-avg = 0
-threshold = 1000
-stateChange = True
-state = 0
-lastState = 0
-sep = ''
-
-##### INIT BOARD
-BoardShim.enable_dev_board_logger()
-logging.basicConfig(level=logging.DEBUG)
-params = BrainFlowInputParams()
-params.serial_port = "COM4"
-params.timeout = 15
-params.master_board = BoardIds.GANGLION_NATIVE_BOARD
-
-board = BoardShim(params.master_board, params)
-    
-sampleRate = board.get_sampling_rate(params.master_board, 0)
-num_points = sampleRate * 4
-
-
-try:
-    board.prepare_session()
-    board.start_stream(450000)
-except BaseException:
-    logging.warning('Exception', exc_info=True)
-
-
-##### INIT CONNECTION
-sckt_base = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-
-sckt_base.bind((HOST,PORT))
-
-sckt_base.listen(1)
-
-conn, addr = sckt_base.accept()
-with conn:
-    conn.setblocking(False)
-    print('Connected by', addr)
-
-    ##### TRANSMIT AND RECEIVE LOOP
-    while isRunning:
-        #RX
-        
-        try:
-            rxBytes = conn.recv(1024)
-            if(rxBytes.decode() == 'end'):
-                isRunning = False
-                break
-        except:
-            a = 1
-        
-        
-
-        #TX
-        try:
-            #Determine avg
-            data = board.get_board_data()
-            channel_data = data[1]
-
-            if len(channel_data) > 0:
-                avg = abs(np.mean(channel_data))
-                print(f"Rolling Avg = {avg:.3f}")
-
-            #Determine State
-            if(avg > threshold):
-                lastState = state
-                state = 1
-            else:
-                lastState = state
-                state = 0
-
-            if(lastState != state):
-                stateChange = 1
-
-            txBytes = (str(state) + sep).encode('utf-8')
-            print(txBytes)
-            #txBytes = input().encode()
-            conn.send(txBytes)
-
-        except:
-            a = 1
-        time.sleep(0.1)  # poll every 100 ms
-        #End of Loop
-
-
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+from brainflow.board_shim import BoardShim
+
+# Shared acquisition and transport helpers live with the ML pipeline
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Machine-Learned-Inferencing"))
+from emg_core.acquisition import BoardReader
+from emg_core.boards import add_board_arguments, open_board_from_args
+from emg_core.ring_buffer import RingBuffer
+from emg_core.transport import GestureServer, encode_ascii, encode_gesture
+
+###### VARS
+DESCRIPTION = "Push the clenched/relaxed threshold state to TCP clients."
+#TCP Socket
+HOST = ''
+PORT = 50007
+# Bare "0"/"1" like the old single-client server; the Unity clients (Controls.cs,
+# Socket_Test.cs) block on Read() every frame and only understand this format.
+# Set False for framed binary messages once every client reads frames.
+LEGACY_ASCII = True
+RESEND_INTERVAL = 0.1  # seconds; the current state is re-sent this often even when unchanged
+
+#Data
+threshold = 1000
+N = 20               # samples in the rolling average (~100 ms at 200 Hz)
+POLL_INTERVAL = 0.005  # seconds between board reads; a Ganglion packet arrives every ~5-10 ms
+
+
+def classify_loop(board, server, stop_event):
+    """
+    Read new samples as they arrive and publish the state as soon as it changes.
+    The current state is also re-sent every RESEND_INTERVAL seconds, so clients
+    that block on a read each frame always have something to read.
+    """
+    emg_channels = BoardShim.get_emg_channels(board.get_board_id())
+    reader = BoardReader(board, [emg_channels[0]])
+    window = RingBuffer(1, N)
+    state = None
+    confidence = 0.0
+    last_sent = 0.0
+
+    while not stop_event.is_set():
+        data = reader.read()
+        if data.shape[1] > 0:
+            window.extend(data)
+            avg = abs(np.mean(window.latest(len(window))))
+            new_state = int(avg > threshold)
+            if new_state != state:
+                state = new_state
+                # Distance from the threshold, 0 at the boundary and 1 at 0 or 2x threshold
+                confidence = min(abs(avg - threshold) / threshold, 1.0)
+                server.publish(state, confidence)
+                last_sent = time.monotonic()
+                print(f"Rolling Avg = {avg:.3f} -> state {state} ({server.n_clients} clients)")
+        if state is not None and time.monotonic() - last_sent >= RESEND_INTERVAL:
+            server.publish(state, confidence)
+            last_sent = time.monotonic()
+        time.sleep(POLL_INTERVAL)
+
+
+async def serve(board):
+    server = GestureServer(HOST, PORT, encoder=encode_ascii if LEGACY_ASCII else encode_gesture)
+    await server.start()
+
+    stop_event = threading.Event()
+    classifier = threading.Thread(target=classify_loop, args=(board, server, stop_event), daemon=True)
+    classifier.start()
+    try:
+        await server.serve_forever()
+    finally:
+        stop_event.set()
+        classifier.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    add_board_arguments(parser)
+    args = parser.parse_args()
+
+    ##### INIT BOARD
+    board = open_board_from_args(args, log_level=logging.DEBUG)
+    board.start_stream(450000)
+
+    try:
+        asyncio.run(serve(board))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        board.stop_stream()
+        board.release_session()
+
+
+if __name__ == "__main__":
+    main()
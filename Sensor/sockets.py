@@ -1,72 +1,67 @@
-import socket
-import logging
-
-from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds, BrainFlowPresets
-
-###### VARS
-HOST = ''
-PORT = 50007
-
-isRunning = True
-
-num_points = 0
-sampleRate = 0
-
-
-##### INIT BOARD
-BoardShim.enable_dev_board_logger()
-logging.basicConfig(level=logging.DEBUG)
-params = BrainFlowInputParams()
-params.serial_port = "COM4"
-params.timeout = 15
-params.master_board = BoardIds.GANGLION_NATIVE_BOARD
-
-board = BoardShim(params.master_board, params)
-    
-sampleRate = board.get_sampling_rate(params.master_board, 0)
-num_points = sampleRate * 4
-
-
-try:
-    board.prepare_session()
-    board.start_stream(450000)
-except BaseException:
-    logging.warning('Exception', exc_info=True)
-
-
-##### INIT CONNECTION
-sckt_base = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-
-sckt_base.bind((HOST,PORT))
-
-sckt_base.listen(1)
-
-conn, addr = sckt_base.accept()
-with conn:
-    conn.setblocking(False)
-    print('Connected by', addr)
-
-    ##### TRANSMIT AND RECEIVE
-    while isRunning:
-        #RX
-        
-        try:
-            rxBytes = conn.recv(1024)
-            if(rxBytes.decode() == 'end'):
-                isRunning = False
-                break
-        except:
-            a = 1
-        
-        
-
-        #TX
-        try:
-            txBytes = str(board.get_current_board_data(num_points)).encode()
-            #txBytes = input().encode()
-            conn.sendall(txBytes)
-        except:
-            a = 1
-
-
-
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import threading
+
+from brainflow.board_shim import BoardShim
+
+# Shared acquisition and transport helpers live with the ML pipeline
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Machine-Learned-Inferencing"))
+from emg_core.acquisition import BoardReader
+from emg_core.boards import add_board_arguments, open_board_from_args
+from emg_core.transport import RawStreamServer
+
+###### VARS
+DESCRIPTION = "Stream raw EMG samples to TCP clients."
+HOST = ''
+PORT = 50007
+POLL_INTERVAL = 0.01  # seconds between board reads
+
+
+def stream_loop(board, server, stop_event):
+    """Forward every new EMG sample exactly once."""
+    emg_channels = BoardShim.get_emg_channels(board.get_board_id())
+    reader = BoardReader(board, emg_channels)
+
+    while not stop_event.wait(POLL_INTERVAL):
+        data = reader.read()
+        if data.shape[1] > 0:
+            server.publish(data.T)
+
+
+async def serve(board):
+    server = RawStreamServer(HOST, PORT)
+    await server.start()
+
+    stop_event = threading.Event()
+    streamer = threading.Thread(target=stream_loop, args=(board, server, stop_event), daemon=True)
+    streamer.start()
+    try:
+        await server.serve_forever()
+    finally:
+        stop_event.set()
+        streamer.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    add_board_arguments(parser)
+    args = parser.parse_args()
+
+    ##### INIT BOARD
+    board = open_board_from_args(args, log_level=logging.DEBUG)
+    board.start_stream(450000)
+
+    try:
+        asyncio.run(serve(board))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        board.stop_stream()
+        board.release_session()
+
+
+if __name__ == "__main__":
+    main()